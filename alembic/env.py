@@ -22,7 +22,10 @@ if config.config_file_name is not None:
 from db import Base
 from models.blog import Blog
 from models.comment import Comment
+from models.idempotency import IdempotencyKey
 from models.like import Like
+from models.session import UserSession
+from models.tag import BlogTag, Tag
 from models.user import User
 
 target_metadata = Base.metadata
@@ -0,0 +1,45 @@
+"""Hash password reset tokens and index user_id, token_expiry
+
+Outstanding reset tokens are dropped since only their hash is kept now.
+
+Revision ID: 9c3e5d7a1b2f
+Revises: 4b1f0c6e2a7d
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c3e5d7a1b2f'
+down_revision = '4b1f0c6e2a7d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.drop_table('reset_password')
+    op.create_table('reset_password',
+    sa.Column('token_hash', sa.String(length=64), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('token_expiry', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('token_hash')
+    )
+    op.create_index('ix_reset_password_user_id_token_expiry', 'reset_password', ['user_id', 'token_expiry'], unique=False)
+    op.create_index(op.f('ix_reset_password_token_expiry'), 'reset_password', ['token_expiry'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_reset_password_token_expiry'), table_name='reset_password')
+    op.drop_index('ix_reset_password_user_id_token_expiry', table_name='reset_password')
+    op.drop_table('reset_password')
+    op.create_table('reset_password',
+    sa.Column('token', sa.String(length=200), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('token_expiry', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('token'),
+    sa.UniqueConstraint('token')
+    )
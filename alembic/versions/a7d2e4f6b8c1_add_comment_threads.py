@@ -0,0 +1,45 @@
+"""Add parent_id, thread_id and path to comments
+
+Revision ID: a7d2e4f6b8c1
+Revises: 9c3e5d7a1b2f
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d2e4f6b8c1'
+down_revision = '9c3e5d7a1b2f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('comments') as batch_op:
+        batch_op.add_column(sa.Column('parent_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('thread_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('path', sa.String(length=255), nullable=True))
+        batch_op.add_column(sa.Column('created_at', sa.DateTime(), nullable=True))
+        batch_op.create_foreign_key('fk_comments_parent_id_comments', 'comments', ['parent_id'], ['id'], ondelete='CASCADE')
+
+    # Existing comments become top level comments of their own thread
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute("UPDATE comments SET thread_id = id, path = printf('%010d', id)")
+    else:
+        op.execute("UPDATE comments SET thread_id = id, path = lpad(CAST(id AS VARCHAR), 10, '0')")
+
+    op.create_index('ix_comments_post_id_parent_id_id', 'comments', ['post_id', 'parent_id', 'id'], unique=False)
+    op.create_index('ix_comments_thread_id_path', 'comments', ['thread_id', 'path'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_comments_thread_id_path', table_name='comments')
+    op.drop_index('ix_comments_post_id_parent_id_id', table_name='comments')
+    with op.batch_alter_table('comments') as batch_op:
+        batch_op.drop_constraint('fk_comments_parent_id_comments', type_='foreignkey')
+        batch_op.drop_column('created_at')
+        batch_op.drop_column('path')
+        batch_op.drop_column('thread_id')
+        batch_op.drop_column('parent_id')
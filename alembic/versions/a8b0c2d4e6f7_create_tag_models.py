@@ -0,0 +1,43 @@
+"""Create tag models
+
+Revision ID: a8b0c2d4e6f7
+Revises: f7a9b1c3d5e6
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8b0c2d4e6f7'
+down_revision = 'f7a9b1c3d5e6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('tags',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=True),
+    sa.Column('blog_count', sa.Integer(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_tags_name'), 'tags', ['name'], unique=True)
+    op.create_index('ix_tags_blog_count_name', 'tags', ['blog_count', 'name'], unique=False)
+    op.create_table('blog_tags',
+    sa.Column('blog_id', sa.Integer(), nullable=False),
+    sa.Column('tag_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['blog_id'], ['blogs.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['tag_id'], ['tags.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('blog_id', 'tag_id')
+    )
+    op.create_index('ix_blog_tags_tag_id_blog_id', 'blog_tags', ['tag_id', 'blog_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_blog_tags_tag_id_blog_id', table_name='blog_tags')
+    op.drop_table('blog_tags')
+    op.drop_index('ix_tags_blog_count_name', table_name='tags')
+    op.drop_index(op.f('ix_tags_name'), table_name='tags')
+    op.drop_table('tags')
@@ -0,0 +1,25 @@
+"""Add blogs_version to users
+
+Revision ID: a9b1c3d5e7f9
+Revises: b9c1d3e5f7a8
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9b1c3d5e7f9'
+down_revision = 'b9c1d3e5f7a8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('users', sa.Column('blogs_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('blogs_version')
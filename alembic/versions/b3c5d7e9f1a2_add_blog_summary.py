@@ -0,0 +1,27 @@
+"""Add summary to blogs
+
+Revision ID: b3c5d7e9f1a2
+Revises: a7d2e4f6b8c1
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3c5d7e9f1a2'
+down_revision = 'a7d2e4f6b8c1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('blogs', sa.Column('summary', sa.String(length=280), nullable=True))
+    # New and updated blogs get a word aligned summary from the application
+    op.execute("UPDATE blogs SET summary = substr(content, 1, 280)")
+
+
+def downgrade():
+    with op.batch_alter_table('blogs') as batch_op:
+        batch_op.drop_column('summary')
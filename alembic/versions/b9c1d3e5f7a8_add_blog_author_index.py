@@ -0,0 +1,24 @@
+"""Add covering index for blogs by author
+
+Revision ID: b9c1d3e5f7a8
+Revises: a8b0c2d4e6f7
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9c1d3e5f7a8'
+down_revision = 'a8b0c2d4e6f7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_blogs_user_id_created_at_id', 'blogs', ['user_id', 'created_at', 'id'], unique=False, postgresql_include=['title', 'summary', 'views'], postgresql_where=sa.text('deleted_at IS NULL'), sqlite_where=sa.text('deleted_at IS NULL'))
+
+
+def downgrade():
+    op.drop_index('ix_blogs_user_id_created_at_id', table_name='blogs')
@@ -0,0 +1,37 @@
+"""Add content_gzip to blogs
+
+Revision ID: c4d6e8f0a2b3
+Revises: b3c5d7e9f1a2
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+import gzip
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d6e8f0a2b3'
+down_revision = 'b3c5d7e9f1a2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('blogs', sa.Column('content_gzip', sa.LargeBinary(), nullable=True))
+
+
+def downgrade():
+    # Move compressed bodies back into the content column before dropping it
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.text("SELECT id, content_gzip FROM blogs WHERE content_gzip IS NOT NULL")
+    ).fetchall()
+    for blog_id, content_gzip in rows:
+        bind.execute(
+            sa.text("UPDATE blogs SET content = :content WHERE id = :id"),
+            {"content": gzip.decompress(content_gzip).decode(), "id": blog_id},
+        )
+    with op.batch_alter_table('blogs') as batch_op:
+        batch_op.drop_column('content_gzip')
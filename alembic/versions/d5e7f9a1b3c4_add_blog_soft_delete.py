@@ -0,0 +1,29 @@
+"""Add deleted_at to blogs
+
+Revision ID: d5e7f9a1b3c4
+Revises: c4d6e8f0a2b3
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5e7f9a1b3c4'
+down_revision = 'c4d6e8f0a2b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('blogs', sa.Column('deleted_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_blogs_live_id', 'blogs', ['id'], unique=False, postgresql_where=sa.text('deleted_at IS NULL'), sqlite_where=sa.text('deleted_at IS NULL'))
+    op.create_index('ix_blogs_deleted_at', 'blogs', ['deleted_at'], unique=False, postgresql_where=sa.text('deleted_at IS NOT NULL'), sqlite_where=sa.text('deleted_at IS NOT NULL'))
+
+
+def downgrade():
+    op.drop_index('ix_blogs_deleted_at', table_name='blogs')
+    op.drop_index('ix_blogs_live_id', table_name='blogs')
+    with op.batch_alter_table('blogs') as batch_op:
+        batch_op.drop_column('deleted_at')
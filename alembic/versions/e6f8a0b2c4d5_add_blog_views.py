@@ -0,0 +1,27 @@
+"""Add views to blogs
+
+Revision ID: e6f8a0b2c4d5
+Revises: d5e7f9a1b3c4
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6f8a0b2c4d5'
+down_revision = 'd5e7f9a1b3c4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('blogs', sa.Column('views', sa.Integer(), server_default='0', nullable=False))
+    op.create_index('ix_blogs_views', 'blogs', ['views'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_blogs_views', table_name='blogs')
+    with op.batch_alter_table('blogs') as batch_op:
+        batch_op.drop_column('views')
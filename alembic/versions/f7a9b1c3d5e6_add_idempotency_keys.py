@@ -0,0 +1,39 @@
+"""Add idempotency keys and unique likes
+
+Revision ID: f7a9b1c3d5e6
+Revises: e6f8a0b2c4d5
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7a9b1c3d5e6'
+down_revision = 'e6f8a0b2c4d5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('idempotency_keys',
+    sa.Column('key_hash', sa.String(length=64), nullable=False),
+    sa.Column('request_hash', sa.String(length=64), nullable=False),
+    sa.Column('status_code', sa.Integer(), nullable=True),
+    sa.Column('media_type', sa.String(length=100), nullable=True),
+    sa.Column('body', sa.LargeBinary(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('key_hash')
+    )
+    op.create_index(op.f('ix_idempotency_keys_expires_at'), 'idempotency_keys', ['expires_at'], unique=False)
+    # Keep the oldest of duplicate likes left by the old toggle racing with itself
+    op.execute('DELETE FROM likes WHERE id NOT IN (SELECT id FROM (SELECT MIN(id) AS id FROM likes GROUP BY post_id, user_id) AS keep)')
+    op.create_index('uq_likes_post_id_user_id', 'likes', ['post_id', 'user_id'], unique=True)
+
+
+def downgrade():
+    op.drop_index('uq_likes_post_id_user_id', table_name='likes')
+    op.drop_index(op.f('ix_idempotency_keys_expires_at'), table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
@@ -0,0 +1,214 @@
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Server preference when the client accepts several encodings equally
+ENCODINGS = [
+    encoding
+    for encoding, module in (("br", brotli), ("zstd", zstandard), ("gzip", zlib))
+    if module is not None
+]
+
+# Media types that are already compressed or must reach the client unbuffered
+SKIP_MEDIA_TYPES = ("image/", "video/", "audio/", "text/event-stream")
+
+
+class GzipCompressor:
+    def __init__(self):
+        self.compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes) -> bytes:
+        # Sync flush so every chunk of a streamed response reaches the client
+        return self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self.compressor.flush()
+
+
+class BrotliCompressor:
+    def __init__(self):
+        self.compressor = brotli.Compressor(quality=4)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.process(data) + self.compressor.flush()
+
+    def finish(self) -> bytes:
+        return self.compressor.finish()
+
+
+class ZstdCompressor:
+    def __init__(self):
+        self.compressor = zstandard.ZstdCompressor(level=3).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.compress(data) + self.compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self) -> bytes:
+        return self.compressor.flush()
+
+
+COMPRESSORS = {"gzip": GzipCompressor, "br": BrotliCompressor, "zstd": ZstdCompressor}
+
+
+def accepted_encodings(accept_encoding: str) -> dict[str, float]:
+    """Parse an Accept-Encoding header into encodings and their q values
+
+    Args:
+        accept_encoding (str): Value of the Accept-Encoding header
+
+    Returns:
+        dict[str, float]: Quality of each accepted encoding
+    """
+    accepted = {}
+    for part in accept_encoding.split(","):
+        encoding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if encoding:
+            accepted[encoding.lower()] = quality
+    return accepted
+
+
+def accepts_encoding(accept_encoding: str, encoding: str) -> bool:
+    """Tell whether a client accepts an encoding, honouring q=0 and *
+
+    Args:
+        accept_encoding (str): Value of the Accept-Encoding header
+        encoding (str): Encoding to check
+
+    Returns:
+        bool: True if the encoding has a non zero quality
+    """
+    accepted = accepted_encodings(accept_encoding)
+    return accepted.get(encoding, accepted.get("*", 0.0)) > 0
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    """Pick the best supported encoding the client accepts
+
+    Args:
+        accept_encoding (str): Value of the Accept-Encoding header
+
+    Returns:
+        str | None: Encoding to use or None to send the body as is
+    """
+    accepted = accepted_encodings(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in ENCODINGS:
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class CompressionMiddleware:
+    """Compress response bodies of at least minimum_size bytes
+
+    Responses that already have a Content-Encoding, such as precompressed
+    blog content, are passed through untouched.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1000):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = CompressionResponder(self.app, encoding, self.minimum_size)
+        await responder(scope, receive, send)
+
+
+class CompressionResponder:
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send: Send
+        self.start_message: Message | None = None
+        self.compressor = None
+        self.passthrough = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    def should_skip(self, headers: Headers) -> bool:
+        media_type = headers.get("content-type", "")
+        return (
+            "content-encoding" in headers
+            or self.start_message["status"] in (204, 206, 304)
+            or media_type.startswith(SKIP_MEDIA_TYPES)
+        )
+
+    async def send_compressed(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            self.passthrough = self.should_skip(Headers(raw=message["headers"]))
+            return
+
+        if self.passthrough or message["type"] != "http.response.body":
+            if self.start_message is not None:
+                await self.send(self.start_message)
+                self.start_message = None
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            if not more_body and len(body) < self.minimum_size:
+                self.passthrough = True
+                await self.send(self.start_message)
+                self.start_message = None
+                await self.send(message)
+                return
+
+            headers["content-encoding"] = self.encoding
+            headers.add_vary_header("accept-encoding")
+            self.compressor = COMPRESSORS[self.encoding]()
+            if more_body:
+                # The final length of a streamed body is not known upfront
+                del headers["content-length"]
+            else:
+                body = self.compressor.compress(body) + self.compressor.finish()
+                headers["content-length"] = str(len(body))
+                await self.send(self.start_message)
+                self.start_message = None
+                await self.send({"type": "http.response.body", "body": body})
+                return
+            await self.send(self.start_message)
+            self.start_message = None
+
+        body = self.compressor.compress(body) if body else b""
+        if not more_body:
+            body += self.compressor.finish()
+        await self.send(
+            {"type": "http.response.body", "body": body, "more_body": more_body}
+        )
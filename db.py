@@ -1,12 +1,143 @@
-from sqlalchemy.engine import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+import itertools
+import threading
+import time
+from collections import deque
 
-from settings import settings
+from sqlalchemy.engine import Engine, create_engine, make_url
+from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import Pool, StaticPool
 
-DATABASE_URL = settings.DATABASE_URL
+from settings import Settings, get_settings
 
-engine = create_engine(
-    url=DATABASE_URL, echo=settings.DEBUG, connect_args={"check_same_thread": False}
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
 Base = declarative_base()
+
+_engine: Engine | None = None
+_replica_engines: list[Engine] = []
+_replica_cycle = itertools.cycle(_replica_engines)
+
+
+class CheckoutWait:
+    """Rolling window of the time spent waiting for pooled connections"""
+
+    def __init__(self, window: int = 1000):
+        self._waits: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._waits.append(seconds)
+
+    def stats(self) -> dict:
+        """Return the average and maximum wait of the recent checkouts"""
+        with self._lock:
+            waits = list(self._waits)
+        return {
+            "checkouts": len(waits),
+            "avg_ms": round(sum(waits) / len(waits) * 1000, 2) if waits else 0.0,
+            "max_ms": round(max(waits) * 1000, 2) if waits else 0.0,
+        }
+
+
+class TimedPoolMixin:
+    """Records how long each checkout waited, including connecting"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_wait = CheckoutWait()
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            self.checkout_wait.record(time.perf_counter() - started)
+
+
+_timed_pools: dict[type[Pool], type[Pool]] = {}
+
+
+def timed_pool_class(pool_class: type[Pool]) -> type[Pool]:
+    """Return a subclass of pool_class that records checkout waits"""
+    if pool_class not in _timed_pools:
+        _timed_pools[pool_class] = type(
+            f"Timed{pool_class.__name__}", (TimedPoolMixin, pool_class), {}
+        )
+    return _timed_pools[pool_class]
+
+
+def build_engine(url: str, echo: bool = False) -> Engine:
+    """Create an engine with dialect specific connection arguments
+
+    Args:
+        url (str): Database url
+        echo (bool, optional): Log every statement
+
+    Returns:
+        Engine: New engine
+    """
+    kwargs = {}
+    if url.startswith("sqlite"):
+        kwargs["connect_args"] = {"check_same_thread": False}
+        if url in ("sqlite://", "sqlite:///:memory:"):
+            # Share the single in-memory database across sessions
+            kwargs["poolclass"] = StaticPool
+    if "poolclass" not in kwargs:
+        parsed = make_url(url)
+        kwargs["poolclass"] = parsed.get_dialect().get_pool_class(parsed)
+    kwargs["poolclass"] = timed_pool_class(kwargs["poolclass"])
+    return create_engine(url=url, echo=echo, **kwargs)
+
+
+def init_engine(settings: Settings) -> Engine:
+    """Create the primary and replica engines and bind the session factory
+
+    Args:
+        settings (Settings): Settings to read the database urls from
+
+    Returns:
+        Engine: The primary engine
+    """
+    global _engine, _replica_cycle
+    dispose_engine()
+    _engine = build_engine(settings.DATABASE_URL, echo=settings.DEBUG)
+    _replica_engines.extend(
+        build_engine(url, echo=settings.DEBUG) for url in settings.DATABASE_REPLICA_URLS
+    )
+    _replica_cycle = itertools.cycle(_replica_engines)
+    SessionLocal.configure(bind=_engine)
+    return _engine
+
+
+def get_engine() -> Engine:
+    """Return the application engine, creating it on first use"""
+    if _engine is None:
+        return init_engine(get_settings())
+    return _engine
+
+
+def get_read_engine() -> Engine:
+    """Return the next replica engine, or the primary if there are no replicas"""
+    engine = get_engine()
+    if not _replica_engines:
+        return engine
+    return next(_replica_cycle)
+
+
+def get_engines() -> dict[str, Engine]:
+    """Return the primary and replica engines by name, for diagnostics"""
+    engines = {"primary": get_engine()}
+    for i, replica in enumerate(_replica_engines):
+        engines[f"replica_{i}"] = replica
+    return engines
+
+
+def dispose_engine() -> None:
+    """Close every pooled connection of the primary and replica engines"""
+    global _engine
+    if _engine is not None:
+        _engine.dispose()
+        _engine = None
+    for replica in _replica_engines:
+        replica.dispose()
+    _replica_engines.clear()
@@ -1,11 +1,49 @@
 from typing import Generator
 
-from db import SessionLocal
+from fastapi import Request
+
+from db import SessionLocal, get_engine, get_read_engine
+from settings import get_settings
+
+# Set after a successful write so the client's next reads see its own writes
+READ_PRIMARY_COOKIE = "read_primary"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
 
 
 def get_db() -> Generator:
-    db = SessionLocal()
+    db = SessionLocal(bind=get_engine())
     try:
         yield db
     finally:
         db.close()
+
+
+def get_read_db(request: Request) -> Generator:
+    """Session for read only endpoints, bound to a replica when possible
+
+    Clients that wrote within READ_YOUR_WRITES_SECONDS carry the
+    read_primary cookie and keep reading from the primary until it expires,
+    so replication lag never hides their own changes.
+    """
+    if READ_PRIMARY_COOKIE in request.cookies:
+        engine = get_engine()
+    else:
+        engine = get_read_engine()
+    db = SessionLocal(bind=engine)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def read_your_writes(request: Request, call_next):
+    """Middleware marking clients that just wrote to the primary"""
+    response = await call_next(request)
+    if request.method not in SAFE_METHODS and response.status_code < 400:
+        response.set_cookie(
+            READ_PRIMARY_COOKIE,
+            "1",
+            max_age=get_settings().READ_YOUR_WRITES_SECONDS,
+            httponly=True,
+        )
+    return response
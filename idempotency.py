@@ -0,0 +1,147 @@
+import hashlib
+from typing import Callable
+
+from fastapi.concurrency import run_in_threadpool
+from loguru import logger
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Match, Router
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+HEADER = "idempotency-key"
+MAX_KEY_LENGTH = 255
+UNSAFE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+def idempotent(endpoint: Callable) -> Callable:
+    """Mark an endpoint as replayable with an Idempotency-Key header
+
+    Apply below the route decorator:
+
+        @router.post("/")
+        @idempotent
+        def create_blog(...):
+    """
+    endpoint.idempotent = True
+    return endpoint
+
+
+def is_idempotent(router: Router, scope: Scope) -> bool:
+    for route in router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(getattr(route, "endpoint", None), "idempotent", False)
+    return False
+
+
+class IdempotencyMiddleware:
+    """Replay the stored response of requests retried with the same key
+
+    The first request with a key reserves it by inserting a row, runs and
+    stores its response. Retries with the same key get that response
+    without running the endpoint again. Keys are scoped to the method, path
+    and Authorization header, so clients can't see each other's responses.
+    """
+
+    def __init__(self, app: ASGIApp, router: Router):
+        self.app = app
+        self.router = router
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in UNSAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        key = headers.get(HEADER)
+        if key is None or not is_idempotent(self.router, scope):
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            response = JSONResponse(
+                {"detail": "Invalid Idempotency-Key"}, status_code=400
+            )
+            await response(scope, receive, send)
+            return
+
+        from services.idempotency import IdempotencyKeys
+
+        body = await read_body(receive)
+        key_hash = hashlib.sha256(
+            "\n".join(
+                (key, scope["method"], scope["path"], headers.get("authorization", ""))
+            ).encode()
+        ).hexdigest()
+        request_hash = hashlib.sha256(body).hexdigest()
+
+        stored = await run_in_threadpool(IdempotencyKeys.claim, key_hash, request_hash)
+        if stored is not None:
+            await replay(stored, request_hash, scope, receive, send)
+            return
+
+        response_start: Message | None = None
+        chunks: list[bytes] = []
+
+        async def replay_body() -> Message:
+            nonlocal body
+            message = {"type": "http.request", "body": body, "more_body": False}
+            body = b""
+            return message
+
+        async def capture(message: Message) -> None:
+            nonlocal response_start
+            if message["type"] == "http.response.start":
+                response_start = message
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_body, capture)
+        except Exception:
+            await run_in_threadpool(IdempotencyKeys.release, key_hash)
+            raise
+
+        status_code = response_start["status"] if response_start else 500
+        if status_code >= 500:
+            # Server errors are worth retrying, so the key is not kept
+            await run_in_threadpool(IdempotencyKeys.release, key_hash)
+            return
+        media_type = Headers(raw=response_start["headers"]).get("content-type")
+        await run_in_threadpool(
+            IdempotencyKeys.complete,
+            key_hash,
+            status_code,
+            media_type,
+            b"".join(chunks),
+        )
+
+
+async def read_body(receive: Receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+async def replay(stored, request_hash: str, scope: Scope, receive: Receive, send: Send):
+    if stored.request_hash != request_hash:
+        response = JSONResponse(
+            {"detail": "Idempotency-Key was used with a different request"},
+            status_code=422,
+        )
+    elif stored.status_code is None:
+        response = JSONResponse(
+            {"detail": "A request with this Idempotency-Key is in progress"},
+            status_code=409,
+        )
+    else:
+        logger.info(f"Replaying response for idempotency key {stored.key_hash}")
+        response = Response(
+            content=stored.body,
+            status_code=stored.status_code,
+            media_type=stored.media_type,
+            headers={"Idempotent-Replayed": "true"},
+        )
+    await response(scope, receive, send)
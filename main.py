@@ -1,17 +1,135 @@
 from fastapi import FastAPI
 
-from routers import blogs, comments, likes, ping, users
-from settings import settings
+from settings import Settings, get_settings, set_settings
 
-api = FastAPI(title="Mini blog API", description="An API for a simple blogging system")
 
-api.include_router(blogs.router)
-api.include_router(comments.router)
-api.include_router(users.router)
-api.include_router(likes.router)
-api.include_router(ping.router)
+def create_app(settings: Settings | None = None) -> FastAPI:
+    """Build the application
+
+    Routers are imported here instead of at module level so that importing
+    `main` stays cheap. The database engine and password context are built
+    on startup, inside the worker process that serves requests.
+
+    Args:
+        settings (Settings, optional): Settings to use, read from the
+            environment when not given
+
+    Returns:
+        FastAPI: The application
+    """
+    if settings is not None:
+        set_settings(settings)
+    settings = get_settings()
+
+    from services.storage import set_storage
+
+    # Built again from these settings, e.g. for a different MEDIA_ROOT
+    set_storage(None)
+
+    from dependencies import read_your_writes
+    from routers import blogs, comments, events, health, likes, media, ping, users
+
+    api = FastAPI(
+        title="Mini blog API", description="An API for a simple blogging system"
+    )
+
+    api.include_router(blogs.router, prefix=settings.API_ENTRYPOINT)
+    api.include_router(comments.router, prefix=settings.API_ENTRYPOINT)
+    api.include_router(events.router, prefix=settings.API_ENTRYPOINT)
+    api.include_router(users.router, prefix=settings.API_ENTRYPOINT)
+    api.include_router(likes.router, prefix=settings.API_ENTRYPOINT)
+    api.include_router(ping.router, prefix=settings.API_ENTRYPOINT)
+    api.include_router(health.router, prefix=settings.API_ENTRYPOINT)
+    api.include_router(media.router, prefix=settings.MEDIA_URL)
+    if settings.PROFILING_ENABLED:
+        from routers import profiles
+
+        api.include_router(profiles.router, prefix=settings.API_ENTRYPOINT)
+
+    from idempotency import IdempotencyMiddleware
+
+    api.add_middleware(IdempotencyMiddleware, router=api.router)
+    if settings.COMPRESSION_MINIMUM_SIZE > 0:
+        from compression import CompressionMiddleware
+
+        api.add_middleware(
+            CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE
+        )
+    if settings.DATABASE_REPLICA_URLS:
+        api.middleware("http")(read_your_writes)
+    if settings.PROFILING_ENABLED:
+        import profiling
+
+        # Outermost, so the time spent in the other middlewares is counted
+        api.add_middleware(
+            profiling.ProfilingMiddleware, profiler=profiling.configure(settings)
+        )
+
+    @api.on_event("startup")
+    async def startup():
+        from db import init_engine
+        from services import jobs, views
+        from services.auth import Auth
+        from services.idempotency import IdempotencyKeys
+        from services.reaper import BlogReaper
+        from services.sessions import Sessions
+
+        init_engine(settings)
+        Auth.configure(settings)
+        health.reset()
+
+        jobs.schedule(
+            "purge_sessions",
+            settings.SESSION_PURGE_INTERVAL_SECONDS,
+            Sessions.purge_expired,
+        )
+        jobs.schedule(
+            "purge_reset_tokens",
+            settings.PASSWORD_RESET_PURGE_INTERVAL_SECONDS,
+            Auth.purge_expired_reset_tokens,
+        )
+        jobs.schedule(
+            "reap_blogs", settings.BLOG_REAPER_INTERVAL_SECONDS, BlogReaper.reap
+        )
+        jobs.schedule(
+            "purge_idempotency_keys",
+            settings.IDEMPOTENCY_PURGE_INTERVAL_SECONDS,
+            IdempotencyKeys.purge_expired,
+        )
+        jobs.schedule("flush_views", settings.VIEW_FLUSH_INTERVAL_SECONDS, views.flush)
+        jobs.start()
+
+    @api.on_event("shutdown")
+    async def shutdown():
+        from db import dispose_engine
+        from services import executors, jobs, views
+
+        await jobs.stop()
+        views.flush()
+        executors.shutdown()
+        dispose_engine()
+        if settings.PROFILING_ENABLED:
+            import profiling
+
+            profiling.profiler.shutdown()
+
+    return api
+
+
+_api: FastAPI | None = None
+
+
+def __getattr__(name: str):
+    # `main:api` is built on first access so `import main` has no side effects
+    global _api
+    if name == "api":
+        if _api is None:
+            _api = create_app()
+        return _api
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run("main:api", reload=settings.DEBUG)
+    uvicorn.run("main:create_app", factory=True, reload=get_settings().DEBUG)
@@ -1,19 +1,106 @@
+import gzip
+import re
 from datetime import datetime
 
 import sqlalchemy as sa
+from sqlalchemy.orm import deferred, relationship
 
 from db import Base
+from models.tag import BlogTag, Tag
+from settings import get_settings
+
+SUMMARY_LENGTH = 280
+
+
+def make_summary(content: str | None) -> str:
+    """Shorten content to at most SUMMARY_LENGTH characters on a word boundary
+
+    Args:
+        content (str | None): Full blog content
+
+    Returns:
+        str: Summary of the content
+    """
+    text = re.sub(r"\s+", " ", content or "").strip()
+    if len(text) <= SUMMARY_LENGTH:
+        return text
+    cut = text[: SUMMARY_LENGTH - 1].rsplit(" ", 1)[0]
+    return f"{cut}…"
 
 
 class Blog(Base):
     __tablename__ = "blogs"
+    __table_args__ = (
+        # Live blogs for the list endpoints, deleted ones for the reaper
+        sa.Index(
+            "ix_blogs_live_id",
+            "id",
+            postgresql_where=sa.text("deleted_at IS NULL"),
+            sqlite_where=sa.text("deleted_at IS NULL"),
+        ),
+        sa.Index(
+            "ix_blogs_deleted_at",
+            "deleted_at",
+            postgresql_where=sa.text("deleted_at IS NOT NULL"),
+            sqlite_where=sa.text("deleted_at IS NOT NULL"),
+        ),
+        sa.Index("ix_blogs_views", "views"),
+        # Covers the per author listing, so it never reads the table itself
+        sa.Index(
+            "ix_blogs_user_id_created_at_id",
+            "user_id",
+            "created_at",
+            "id",
+            postgresql_include=["title", "summary", "views"],
+            postgresql_where=sa.text("deleted_at IS NULL"),
+            sqlite_where=sa.text("deleted_at IS NULL"),
+        ),
+    )
     id = sa.Column(sa.Integer, primary_key=True)
     title = sa.Column(sa.String(200))
-    content = sa.Column(sa.Text)
+    summary = sa.Column(sa.String(SUMMARY_LENGTH))
+    # The body is only loaded when accessed, so list queries never read it.
+    # Large bodies are stored gzipped in content_gzip instead of content_text
+    # when BLOG_CONTENT_COMPRESSION is enabled.
+    content_text = deferred(sa.Column("content", sa.Text), group="body")
+    content_gzip = deferred(sa.Column(sa.LargeBinary), group="body")
+    # Tells whether the body is stored gzipped without reading it
+    content_compressed = deferred(content_gzip.columns[0].isnot(None))
     created_at = sa.Column(sa.DateTime, default=datetime.utcnow)
+    # Incremented in batches by services.views, lags reads by up to a flush
+    views = sa.Column(sa.Integer, nullable=False, default=0, server_default="0")
+    # Set on delete, the row and its comments and likes are removed later
+    deleted_at = sa.Column(sa.DateTime, nullable=True)
     user_id = sa.Column(
         sa.Integer, sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False
     )
 
+    # Read only, tags are changed through services.tags to keep counts right
+    tags = relationship(
+        Tag, secondary=BlogTag.__table__, viewonly=True, order_by=Tag.name
+    )
+
     def __repr__(self):
         return self.title
+
+    @property
+    def content(self) -> str | None:
+        if self.content_gzip is not None:
+            return gzip.decompress(self.content_gzip).decode()
+        return self.content_text
+
+    @content.setter
+    def content(self, content: str | None) -> None:
+        self.summary = make_summary(content)
+        settings = get_settings()
+        data = (content or "").encode()
+        if (
+            settings.BLOG_CONTENT_COMPRESSION
+            and len(data) >= settings.BLOG_CONTENT_COMPRESSION_MIN_BYTES
+        ):
+            # mtime=0 keeps the stored bytes identical for identical content
+            self.content_gzip = gzip.compress(data, mtime=0)
+            self.content_text = None
+        else:
+            self.content_gzip = None
+            self.content_text = content
@@ -1,14 +1,35 @@
+from datetime import datetime
+
 import sqlalchemy as sa
 
 from db import Base
 
+# Width of each id in Comment.path, zero padded so paths sort like the tree
+PATH_SEGMENT_WIDTH = 10
+
 
 class Comment(Base):
     __tablename__ = "comments"
+    __table_args__ = (
+        sa.Index("ix_comments_post_id_parent_id_id", "post_id", "parent_id", "id"),
+        sa.Index("ix_comments_thread_id_path", "thread_id", "path"),
+    )
     id = sa.Column(sa.Integer, primary_key=True)
     content = sa.Column(sa.Text)
     post_id = sa.Column(sa.Integer, sa.ForeignKey("blogs.id", ondelete="CASCADE"))
     user_id = sa.Column(sa.Integer, sa.ForeignKey("users.id", ondelete="CASCADE"))
+    parent_id = sa.Column(
+        sa.Integer, sa.ForeignKey("comments.id", ondelete="CASCADE"), nullable=True
+    )
+    # Id of the top level comment of the thread
+    thread_id = sa.Column(sa.Integer)
+    # Ids from the top level comment down to this one, e.g. 0000000001/0000000007
+    path = sa.Column(sa.String(255))
+    created_at = sa.Column(sa.DateTime, default=datetime.utcnow)
 
     def __repr__(self):
         return self.content
+
+    @staticmethod
+    def path_segment(comment_id: int) -> str:
+        return str(comment_id).zfill(PATH_SEGMENT_WIDTH)
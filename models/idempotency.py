@@ -0,0 +1,21 @@
+from datetime import datetime
+
+import sqlalchemy as sa
+
+from db import Base
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    # sha256 of the key, method, path and credentials of the request
+    key_hash: str = sa.Column(sa.String(64), primary_key=True)
+    request_hash: str = sa.Column(sa.String(64), nullable=False)
+    # Null while the first request with the key is still running
+    status_code: int = sa.Column(sa.Integer, nullable=True)
+    media_type: str = sa.Column(sa.String(100), nullable=True)
+    body: bytes = sa.Column(sa.LargeBinary, nullable=True)
+    created_at: datetime = sa.Column(sa.DateTime, default=datetime.utcnow)
+    expires_at: datetime = sa.Column(sa.DateTime, index=True, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"{self.key_hash} - {self.status_code}"
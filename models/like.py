@@ -5,6 +5,9 @@ from db import Base
 
 class Like(Base):
     __tablename__ = "likes"
+    __table_args__ = (
+        sa.Index("uq_likes_post_id_user_id", "post_id", "user_id", unique=True),
+    )
     id = sa.Column(sa.Integer, primary_key=True)
     post_id = sa.Column(sa.Integer, sa.ForeignKey("blogs.id", ondelete="CASCADE"))
     user_id = sa.Column(sa.Integer, sa.ForeignKey("users.id", ondelete="CASCADE"))
@@ -0,0 +1,20 @@
+from datetime import datetime
+
+import sqlalchemy as sa
+
+from db import Base
+
+
+class UserSession(Base):
+    __tablename__ = "user_sessions"
+    id: int = sa.Column(sa.Integer, primary_key=True)
+    token_hash: str = sa.Column(sa.String(64), index=True, unique=True)
+    user_id: int = sa.Column(
+        sa.Integer, sa.ForeignKey("users.id", ondelete="CASCADE"), index=True
+    )
+    created_at: datetime = sa.Column(sa.DateTime, default=datetime.utcnow)
+    expires_at: datetime = sa.Column(sa.DateTime, index=True)
+    revoked_at: datetime = sa.Column(sa.DateTime, nullable=True)
+
+    def __repr__(self) -> str:
+        return f"{self.user_id} - {self.expires_at}"
@@ -0,0 +1,34 @@
+import sqlalchemy as sa
+
+from db import Base
+
+TAG_NAME_LENGTH = 50
+
+
+class Tag(Base):
+    __tablename__ = "tags"
+    __table_args__ = (sa.Index("ix_tags_blog_count_name", "blog_count", "name"),)
+    id: int = sa.Column(sa.Integer, primary_key=True)
+    name: str = sa.Column(sa.String(TAG_NAME_LENGTH), index=True, unique=True)
+    # Number of live blogs with the tag, maintained by services.tags
+    blog_count: int = sa.Column(
+        sa.Integer, nullable=False, default=0, server_default="0"
+    )
+
+    def __repr__(self) -> str:
+        return self.name
+
+
+class BlogTag(Base):
+    __tablename__ = "blog_tags"
+    # The primary key serves lookups by blog, this index filtering by tag
+    __table_args__ = (sa.Index("ix_blog_tags_tag_id_blog_id", "tag_id", "blog_id"),)
+    blog_id: int = sa.Column(
+        sa.Integer, sa.ForeignKey("blogs.id", ondelete="CASCADE"), primary_key=True
+    )
+    tag_id: int = sa.Column(
+        sa.Integer, sa.ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True
+    )
+
+    def __repr__(self) -> str:
+        return f"{self.blog_id} - {self.tag_id}"
@@ -1,3 +1,5 @@
+from datetime import datetime
+
 import sqlalchemy as sa
 
 from db import Base
@@ -9,6 +11,10 @@ class User(Base):
     username: str = sa.Column(sa.String(200), index=True, unique=True)
     password: str = sa.Column(sa.String(200))
     profile_img: str = sa.Column(sa.String(200), nullable=True)
+    # Bumped whenever the user writes a blog, keys cached pages of their blogs
+    blogs_version: int = sa.Column(
+        sa.Integer, nullable=False, default=0, server_default="0"
+    )
 
     def __repr__(self) -> str:
         return self.username
@@ -16,6 +22,9 @@ class User(Base):
 
 class ResetPassword(Base):
     __tablename__ = "reset_password"
-    token: str = sa.Column(sa.String(200), unique=True, primary_key=True)
-    user_id: str = sa.Column(sa.Integer, sa.ForeignKey("users.id", ondelete="CASCADE"))
-    token_expiry: str = sa.Column(sa.DateTime())
+    __table_args__ = (
+        sa.Index("ix_reset_password_user_id_token_expiry", "user_id", "token_expiry"),
+    )
+    token_hash: str = sa.Column(sa.String(64), primary_key=True)
+    user_id: int = sa.Column(sa.Integer, sa.ForeignKey("users.id", ondelete="CASCADE"))
+    token_expiry: datetime = sa.Column(sa.DateTime(), index=True)
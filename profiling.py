@@ -0,0 +1,244 @@
+import contextvars
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from types import CodeType, FrameType
+
+from loguru import logger
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from settings import Settings
+
+try:
+    from anyio._backends._asyncio import WorkerThread
+except ImportError:
+    WorkerThread = None
+
+# Long lived by design, never reported as slow
+SKIP_MEDIA_TYPES = ("text/event-stream",)
+
+# Profile of the request being served, copied into the context sync
+# endpoints and dependencies run with in the threadpool
+_current: contextvars.ContextVar["RequestProfile | None"] = contextvars.ContextVar(
+    "request_profile", default=None
+)
+
+profiler: "Profiler | None" = None
+
+
+class RequestProfile:
+    """Stack samples taken while one request was served"""
+
+    def __init__(self, method: str, path: str, sampled: bool):
+        self.method = method
+        self.path = path
+        self.route = path
+        self.sampled = sampled
+        self.status_code: int | None = None
+        self.media_type: str | None = None
+        self.started_at = datetime.now(timezone.utc)
+        self.started = time.perf_counter()
+        self.duration_ms = 0.0
+        self.stacks: Counter = Counter()
+
+    def folded(self) -> list[str]:
+        """Return the samples in collapsed stack format, most frequent first"""
+        return [f"{stack} {count}" for stack, count in self.stacks.most_common()]
+
+    def as_dict(self) -> dict:
+        return {
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status_code": self.status_code,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration_ms, 2),
+            "sampled": self.sampled,
+            "samples": sum(self.stacks.values()),
+            "stacks": self.folded(),
+        }
+
+
+class Profiler:
+    """Samples the stacks of the threads serving requests
+
+    While requests are in flight a background thread reads the stack of
+    every thread each PROFILING_INTERVAL_MS. A stack belongs to a request
+    when it runs under that request's ProfilingMiddleware call on the event
+    loop, or in a threadpool worker whose context carries the request's
+    profile. Requests slower than PROFILING_SLOW_REQUEST_MS, and a random
+    PROFILING_SAMPLE_RATE of the others, are appended to
+    <PROFILING_DIR>/<route>.folded, which flamegraph.pl, speedscope and
+    inferno read as is.
+    """
+
+    def __init__(self, settings: Settings):
+        self.interval = settings.PROFILING_INTERVAL_MS / 1000
+        self.slow_ms = settings.PROFILING_SLOW_REQUEST_MS
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+        self.directory = settings.PROFILING_DIR
+        self.records: deque[RequestProfile] = deque(
+            maxlen=settings.PROFILING_MAX_RECORDS
+        )
+        self._active: dict[int, RequestProfile] = {}
+        self._pending: deque[RequestProfile] = deque()
+        self._labels: dict[CodeType, str] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._active[id(profile)] = profile
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="profiler", daemon=True
+                )
+                self._thread.start()
+
+    def finish(self, profile: RequestProfile) -> None:
+        """Stop sampling a request and keep its profile if slow or sampled"""
+        profile.duration_ms = (time.perf_counter() - profile.started) * 1000
+        with self._lock:
+            self._active.pop(id(profile), None)
+        if profile.media_type and profile.media_type.startswith(SKIP_MEDIA_TYPES):
+            return
+        if profile.duration_ms >= self.slow_ms or profile.sampled:
+            self.records.append(profile)
+            if profile.stacks:
+                self._pending.append(profile)
+
+    def slowest(self, limit: int) -> list[RequestProfile]:
+        """Return the slowest of the recently kept requests"""
+        records = sorted(self.records, key=lambda p: p.duration_ms, reverse=True)
+        return records[:limit]
+
+    def shutdown(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._write_pending()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                self._sample()
+                self._write_pending()
+            except Exception as e:
+                logger.exception(f"Profiler failed: {e}")
+
+    def _sample(self) -> None:
+        with self._lock:
+            if not self._active:
+                return
+            for frame in sys._current_frames().values():
+                profile, frames = self._owner(frame)
+                if profile is not None and id(profile) in self._active:
+                    profile.stacks[
+                        ";".join(self._label(f.f_code) for f in reversed(frames))
+                    ] += 1
+
+    def _owner(
+        self, frame: FrameType | None
+    ) -> tuple[RequestProfile | None, list[FrameType]]:
+        """Return the request a stack runs for and its frames, leaf first"""
+        frames = []
+        while frame is not None:
+            code = frame.f_code
+            if code is ProfilingMiddleware.__call__.__code__:
+                return frame.f_locals.get("profile"), frames
+            if WorkerThread is not None and code is WorkerThread.run.__code__:
+                context = frame.f_locals.get("context")
+                if isinstance(context, contextvars.Context):
+                    return context.get(_current), frames
+                return None, frames
+            frames.append(frame)
+            frame = frame.f_back
+        return None, frames
+
+    def _label(self, code: CodeType) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = (
+                f"{code.co_name} ({short_path(code.co_filename)}:{code.co_firstlineno})"
+            )
+            self._labels[code] = label
+        return label
+
+    def _write_pending(self) -> None:
+        while self._pending:
+            profile = self._pending.popleft()
+            path = os.path.join(self.directory, route_filename(profile))
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                with open(path, "a") as f:
+                    f.write("".join(f"{line}\n" for line in profile.folded()))
+            except OSError as e:
+                logger.warning(f"Could not write profile {path}: {e}")
+
+
+def short_path(filename: str) -> str:
+    """Strip the sys.path entry a source file was imported from"""
+    best = ""
+    for entry in sys.path:
+        if entry and filename.startswith(entry) and len(entry) > len(best):
+            best = entry
+    return filename[len(best) :].lstrip(os.sep) if best else filename
+
+
+def route_filename(profile: RequestProfile) -> str:
+    name = re.sub(r"[^A-Za-z0-9]+", "_", f"{profile.method} {profile.route}")
+    return f"{name.strip('_')}.folded"
+
+
+class ProfilingMiddleware:
+    """Profile requests with the stack sampler of a Profiler
+
+    Only added to the app when PROFILING_ENABLED is set, so requests don't
+    pay anything for it otherwise.
+    """
+
+    def __init__(self, app: ASGIApp, profiler: Profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        profile = RequestProfile(
+            scope["method"],
+            scope["path"],
+            sampled=random.random() < self.profiler.sample_rate,
+        )
+
+        async def send_status(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+                profile.media_type = Headers(raw=message["headers"]).get("content-type")
+            await send(message)
+
+        token = _current.set(profile)
+        self.profiler.start(profile)
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            _current.reset(token)
+            # Set by the router once it matched the request
+            route = scope.get("route")
+            if route is not None and hasattr(route, "path"):
+                profile.route = route.path
+            self.profiler.finish(profile)
+
+
+def configure(settings: Settings) -> Profiler:
+    """Create the profiler shared by the middleware and /debug/profiles"""
+    global profiler
+    profiler = Profiler(settings)
+    return profiler
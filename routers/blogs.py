@@ -1,55 +1,179 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
-from fastapi.responses import JSONResponse
+from datetime import datetime
+
+import sqlalchemy as sa
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import JSONResponse, PlainTextResponse
 from loguru import logger
 from sqlalchemy.exc import NoResultFound
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload, undefer, undefer_group
 
-from dependencies import get_db
+from compression import accepts_encoding
+from dependencies import get_db, get_read_db
+from idempotency import idempotent
 from models.blog import Blog
+from models.tag import BlogTag, Tag
 from models.user import User
-from schemas.blog import BlogCreate, BlogOut
+from schemas.blog import (
+    BlogCreate,
+    BlogDetailOut,
+    BlogOut,
+    BlogSummaryOut,
+    BlogUpdate,
+    TagOut,
+)
+from services import views
 from services.auth import Auth
-from settings import settings
+from services.author_blogs import AuthorBlogs
+from services.tags import Tags
 from utils import get_object_or_404
 
-router = APIRouter(prefix=f"{settings.API_ENTRYPOINT}/blogs", tags=["Blogs"])
+router = APIRouter(prefix="/blogs", tags=["Blogs"])
 
 
-@router.get("/", response_model=list[BlogOut])
+@router.get("/", response_model=list[BlogSummaryOut])
 def get_blogs(
     limit: int = Query(
         default=5, description="Number of blogs to retrieve", ge=1, le=20
     ),
     offset: int = Query(default=0, description="Number of blogs to skip"),
-    db: Session = Depends(get_db),
+    tag: list[str] = Query(default=[], description="Only blogs with these tags"),
+    match: str = Query(
+        default="all",
+        regex="^(all|any)$",
+        description="Whether blogs need all or any of the tags",
+    ),
+    after: int
+    | None = Query(
+        default=None, description="Id of the last blog of the previous page"
+    ),
+    db: Session = Depends(get_read_db),
 ):
-    """Get all blogs"""
+    """Get all blogs with a summary of their content
+
+    Filtering by tag or passing `after` pages newest first by id instead of
+    by offset, so deep pages cost the same as the first one.
+    """
     logger.info("Getting blogs from database")
 
-    blogs_count = db.query(Blog).count()
+    live = Blog.deleted_at.is_(None)
+    if tag or after is not None:
+        query = db.query(Blog).filter(live)
+        names = list(dict.fromkeys(name.strip().lower() for name in tag))
+        if names:
+            tagged = db.query(BlogTag.blog_id).filter(
+                BlogTag.tag_id.in_(db.query(Tag.id).filter(Tag.name.in_(names)))
+            )
+            if match == "all":
+                tagged = tagged.group_by(BlogTag.blog_id).having(
+                    sa.func.count() == len(names)
+                )
+            query = query.filter(Blog.id.in_(tagged))
+        if after is not None:
+            query = query.filter(Blog.id < after)
+        return query.order_by(Blog.id.desc()).limit(limit).all()
+
+    blogs_count = db.query(sa.func.count(Blog.id)).filter(live).scalar()
     if offset > blogs_count:
         logger.info(f"Offset greater than number of blogs. Returning {limit} blogs")
-        return db.query(Blog).order_by(-Blog.id).limit(limit).all()
-    return db.query(Blog).limit(limit).offset(offset).all()
+        return db.query(Blog).filter(live).order_by(-Blog.id).limit(limit).all()
+    return db.query(Blog).filter(live).limit(limit).offset(offset).all()
 
 
-@router.get("/{blog_id}", response_model=BlogOut)
-def get_blog(blog_id: int, db: Session = Depends(get_db)):
-    """Get a single blog with given id"""
-    blog = get_object_or_404(Blog, blog_id)
-    return blog
+@router.get("/tags", response_model=list[TagOut])
+def get_tags(
+    limit: int = Query(
+        default=20, description="Number of tags to retrieve", ge=1, le=100
+    ),
+    db: Session = Depends(get_read_db),
+):
+    """Get the most used tags with the number of blogs having them"""
+    return (
+        db.query(Tag)
+        .filter(Tag.blog_count > 0)
+        .order_by(Tag.blog_count.desc(), Tag.name)
+        .limit(limit)
+        .all()
+    )
+
+
+@router.get("/top", response_model=list[BlogSummaryOut])
+def get_top_blogs(
+    limit: int = Query(
+        default=5, description="Number of blogs to retrieve", ge=1, le=20
+    ),
+    db: Session = Depends(get_read_db),
+):
+    """Get the most viewed blogs"""
+    return (
+        db.query(Blog)
+        .filter(Blog.deleted_at.is_(None))
+        .order_by(Blog.views.desc(), Blog.id.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+@router.get("/{blog_id}", response_model=BlogDetailOut)
+def get_blog(blog_id: int, request: Request, db: Session = Depends(get_read_db)):
+    """Get a single blog with given id and count the view
+
+    Bodies stored compressed are neither read nor decompressed here, only to
+    be compressed again for the response. Their content is left out and
+    clients fetch content_url, which sends the stored gzip as is.
+    """
+    blog = get_object_or_404(
+        db,
+        Blog,
+        blog_id,
+        undefer(Blog.content_text),
+        undefer(Blog.content_compressed),
+        joinedload(Blog.tags),
+    )
+    views.record(blog.id)
+    return BlogDetailOut(
+        id=blog.id,
+        title=blog.title,
+        content=None if blog.content_compressed else blog.content_text,
+        content_url=request.url_for("get_blog_content", blog_id=blog.id),
+        tags=blog.tags,
+    )
+
+
+@router.get("/{blog_id}/content", response_class=PlainTextResponse)
+def get_blog_content(
+    blog_id: int, request: Request, db: Session = Depends(get_read_db)
+):
+    """Get the raw content of a blog
+
+    Content stored compressed is sent as is to clients accepting gzip.
+    """
+    blog = get_object_or_404(db, Blog, blog_id, undefer_group("body"))
+    if blog.content_gzip is not None and accepts_encoding(
+        request.headers.get("accept-encoding", ""), "gzip"
+    ):
+        return Response(
+            content=blog.content_gzip,
+            media_type="text/plain; charset=utf-8",
+            headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"},
+        )
+    return PlainTextResponse(blog.content or "")
 
 
 @router.post("/", response_model=BlogOut)
+@idempotent
 def create_blog(
     new_blog: BlogCreate,
     db: Session = Depends(get_db),
     user: User = Depends(Auth.get_current_user),
 ):
     """Create a new blog passing in the authenticated user"""
-    blog = Blog(**new_blog.dict(), user_id=user.id)
+    blog = Blog(**new_blog.dict(exclude={"tags"}), user_id=user.id)
     logger.info(f"Creating new blog: {blog}")
     db.add(blog)
+    if new_blog.tags:
+        db.flush()
+        Tags.set_blog_tags(db, blog.id, new_blog.tags, new=True)
+    AuthorBlogs.invalidate(db, user.id)
     db.commit()
     db.refresh(blog)
     return blog
@@ -61,10 +185,20 @@ def delete_blog(
     db: Session = Depends(get_db),
     user: User = Depends(Auth.get_current_user),
 ):
-    """Delete a blog with given id"""
+    """Delete a blog with given id
+
+    The blog is hidden right away, its comments and likes are removed in
+    the background by BlogReaper.
+    """
     logger.info(f"Getting a blog from database with id {blog_id}")
     try:
-        blog = db.query(Blog).filter(Blog.id == blog_id, Blog.user_id == user.id).one()
+        blog = (
+            db.query(Blog)
+            .filter(
+                Blog.id == blog_id, Blog.user_id == user.id, Blog.deleted_at.is_(None)
+            )
+            .one()
+        )
     except NoResultFound:
         logger.info(f"Blog with id {blog_id} not found")
         raise HTTPException(
@@ -72,7 +206,9 @@ def delete_blog(
             detail=f"Blog with id {blog_id} not found.",
         )
 
-    db.delete(blog)
+    blog.deleted_at = datetime.utcnow()
+    Tags.uncount_blog(db, blog.id)
+    AuthorBlogs.invalidate(db, user.id)
     db.commit()
     logger.info(f"Blog with id {blog_id} deleted by user {user.username}")
     return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -81,14 +217,20 @@ def delete_blog(
 @router.put("/{blog_id}", response_model=BlogOut)
 def update_blog(
     blog_id: int,
-    new_blog: BlogCreate,
+    new_blog: BlogUpdate,
     db: Session = Depends(get_db),
     user: User = Depends(Auth.get_current_user),
 ):
     """Update a blog with given id"""
     logger.info(f"Getting a blog from database with id {blog_id}")
     try:
-        blog = db.query(Blog).filter(Blog.id == blog_id, Blog.user_id == user.id).one()
+        blog = (
+            db.query(Blog)
+            .filter(
+                Blog.id == blog_id, Blog.user_id == user.id, Blog.deleted_at.is_(None)
+            )
+            .one()
+        )
     except NoResultFound:
         logger.info(f"Blog with id {blog_id} not found")
         raise HTTPException(
@@ -97,6 +239,9 @@ def update_blog(
         )
     blog.title = new_blog.title
     blog.content = new_blog.content
+    if new_blog.tags is not None:
+        Tags.set_blog_tags(db, blog.id, new_blog.tags)
+    AuthorBlogs.invalidate(db, user.id)
     db.commit()
     db.refresh(blog)
     logger.info(f"Blog with id {blog_id} updated")
@@ -1,28 +1,131 @@
-from fastapi import APIRouter, Depends, HTTPException, Response, status
+from collections import defaultdict
+
+import sqlalchemy as sa
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from loguru import logger
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, aliased
 
-from dependencies import get_db
+from dependencies import get_db, get_read_db
+from idempotency import idempotent
 from models.blog import Blog
-from models.comment import Comment
+from models.comment import PATH_SEGMENT_WIDTH, Comment
 from models.user import User
-from schemas.comment import CommentCreate, CommentOut
+from schemas.comment import CommentCreate, CommentOut, CommentThread, CommentTree
+from services import events
 from services.auth import Auth
-from settings import settings
 from utils import get_object_or_404
 
-router = APIRouter(prefix=f"{settings.API_ENTRYPOINT}/blogs", tags=["Comments"])
+router = APIRouter(prefix="/blogs", tags=["Comments"])
 
 
 @router.get("/{blog_id}/comments", response_model=list[CommentOut])
-def get_comments(blog_id: int, db: Session = Depends(get_db)):
+def get_comments(blog_id: int, db: Session = Depends(get_read_db)):
     """Get comments for a blog"""
-    blog = get_object_or_404(Blog, blog_id)
+    blog = get_object_or_404(db, Blog, blog_id)
     comments = db.query(Comment).filter(Comment.post_id == blog_id).all()
     return comments
 
 
+@router.get("/{blog_id}/comments/threads", response_model=list[CommentThread])
+def get_comment_threads(
+    blog_id: int,
+    limit: int = Query(
+        default=10, description="Number of threads to retrieve", ge=1, le=50
+    ),
+    after: int
+    | None = Query(
+        default=None, description="Id of the last thread of the previous page"
+    ),
+    replies: int = Query(
+        default=3, description="Number of replies to include per thread", ge=0, le=20
+    ),
+    db: Session = Depends(get_read_db),
+):
+    """Get top level comments of a blog with their first replies"""
+    get_object_or_404(db, Blog, blog_id)
+
+    query = db.query(Comment).filter(
+        Comment.post_id == blog_id, Comment.parent_id.is_(None)
+    )
+    if after is not None:
+        query = query.filter(Comment.id > after)
+    threads = query.order_by(Comment.id).limit(limit).all()
+
+    # One query for the replies of every thread on the page, ranked in tree order
+    ranked = (
+        db.query(
+            Comment,
+            sa.func.row_number()
+            .over(partition_by=Comment.thread_id, order_by=Comment.path)
+            .label("rank"),
+            sa.func.count().over(partition_by=Comment.thread_id).label("reply_count"),
+        )
+        .filter(
+            Comment.thread_id.in_([thread.id for thread in threads]),
+            Comment.parent_id.isnot(None),
+        )
+        .subquery()
+    )
+    reply = aliased(Comment, ranked)
+    rows = (
+        db.query(reply, ranked.c.reply_count)
+        .filter(ranked.c.rank <= replies)
+        .order_by(ranked.c.thread_id, ranked.c.path)
+        .all()
+        if threads
+        else []
+    )
+
+    replies_by_thread = defaultdict(list)
+    reply_counts = {}
+    for comment, reply_count in rows:
+        replies_by_thread[comment.thread_id].append(comment)
+        reply_counts[comment.thread_id] = reply_count
+
+    return [
+        CommentThread(
+            **CommentOut.from_orm(thread).dict(),
+            reply_count=reply_counts.get(thread.id, 0),
+            replies=replies_by_thread[thread.id],
+        )
+        for thread in threads
+    ]
+
+
+@router.get("/comments/{comment_id}/tree", response_model=CommentTree)
+def get_comment_tree(
+    comment_id: int,
+    limit: int = Query(
+        default=200, description="Maximum number of replies to include", ge=1, le=1000
+    ),
+    db: Session = Depends(get_read_db),
+):
+    """Get a comment with its replies nested below it"""
+    root = get_object_or_404(db, Comment, comment_id)
+    get_object_or_404(db, Blog, root.post_id)
+    descendants = (
+        db.query(Comment)
+        .filter(
+            Comment.thread_id == root.thread_id,
+            Comment.path.like(f"{root.path}/%"),
+        )
+        .order_by(Comment.path)
+        .limit(limit)
+        .all()
+    )
+
+    # Paths sort parents before their children, so every parent exists
+    # by the time its replies are attached
+    nodes = {root.id: CommentTree.from_orm(root)}
+    for comment in descendants:
+        node = CommentTree.from_orm(comment)
+        nodes[comment.id] = node
+        nodes[comment.parent_id].replies.append(node)
+    return nodes[root.id]
+
+
 @router.post("/{blog_id}/comments", response_model=CommentOut)
+@idempotent
 def create_comment(
     blog_id: int,
     new_comment: CommentCreate,
@@ -31,14 +134,48 @@ def create_comment(
 ):
     """Create a new comment for a blog"""
 
-    blog = get_object_or_404(Blog, blog_id)
-    comment = Comment(content=new_comment.content, post_id=blog.id, user_id=user.id)
+    blog = get_object_or_404(db, Blog, blog_id)
+    parent = None
+    if new_comment.parent_id is not None:
+        parent = (
+            db.query(Comment)
+            .filter(Comment.id == new_comment.parent_id, Comment.post_id == blog.id)
+            .first()
+        )
+        if not parent:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Parent comment not found",
+            )
+        if len(parent.path) + PATH_SEGMENT_WIDTH + 1 > Comment.path.type.length:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Replies are nested too deep",
+            )
+
+    comment = Comment(
+        content=new_comment.content,
+        post_id=blog.id,
+        user_id=user.id,
+        parent_id=new_comment.parent_id,
+    )
     logger.info(f"Creating comment with data: {comment}")
     db.add(comment)
+    # The path ends with the comment's own id, so it is set after the insert
+    db.flush()
+    segment = Comment.path_segment(comment.id)
+    if parent:
+        comment.thread_id = parent.thread_id
+        comment.path = f"{parent.path}/{segment}"
+    else:
+        comment.thread_id = comment.id
+        comment.path = segment
+    # Every column is known after the flush, so no refresh is needed
+    comment_out = CommentOut.from_orm(comment)
     db.commit()
-    db.refresh(comment)
 
-    return comment
+    events.publish(events.blog_topic(blog_id), "comment", comment_out.dict())
+    return comment_out
 
 
 @router.delete("/comments/{comment_id}")
@@ -62,9 +199,14 @@ def delete_comment(
             detail="Comment not found",
         )
 
-    logger.info(f"Deleting comment with id {comment_id}")
-    db.delete(comment)
+    logger.info(f"Deleting comment with id {comment_id} and its replies")
+    blog_id = comment.post_id
+    db.query(Comment).filter(
+        Comment.thread_id == comment.thread_id,
+        sa.or_(Comment.id == comment.id, Comment.path.like(f"{comment.path}/%")),
+    ).delete(synchronize_session=False)
     db.commit()
+    events.publish(events.blog_topic(blog_id), "comment_deleted", {"id": comment_id})
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
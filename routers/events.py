@@ -0,0 +1,53 @@
+import asyncio
+
+from fastapi import APIRouter
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from db import get_read_engine
+from models.blog import Blog
+from services import events
+from settings import get_settings
+from utils import get_object_or_404
+
+router = APIRouter(prefix="/blogs", tags=["Events"])
+
+
+def check_blog(blog_id: int) -> None:
+    # A short lived session, so no connection is held while streaming
+    with Session(get_read_engine()) as db:
+        get_object_or_404(db, Blog, blog_id)
+
+
+async def stream(subscription: events.Subscription, keepalive_seconds: float):
+    try:
+        yield b"retry: 3000\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(
+                    subscription.queue.get(), keepalive_seconds
+                )
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            if message is None:
+                return
+            yield message
+    finally:
+        events.hub.unsubscribe(subscription)
+
+
+@router.get("/{blog_id}/events")
+async def get_blog_events(blog_id: int):
+    """Stream new comments and like counts of a blog as server-sent events
+
+    Events are `comment`, `comment_deleted` and `likes`.
+    """
+    await run_in_threadpool(check_blog, blog_id)
+    subscription = events.hub.subscribe(events.blog_topic(blog_id))
+    return StreamingResponse(
+        stream(subscription, get_settings().SSE_KEEPALIVE_SECONDS),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
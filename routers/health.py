@@ -0,0 +1,196 @@
+import asyncio
+import math
+import time
+
+import anyio
+import sqlalchemy as sa
+from fastapi import APIRouter
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from loguru import logger
+from sqlalchemy.engine import Engine, create_engine
+from sqlalchemy.engine.url import URL
+from sqlalchemy.pool import NullPool
+
+from db import get_engine, get_engines
+from services import events, executors
+from services.cache import get_caches
+from settings import get_settings
+
+router = APIRouter(prefix="/health", tags=["Default"])
+
+_lock = asyncio.Lock()
+_last_checked = 0.0
+_last_result: tuple[bool, dict] | None = None
+_probe_engines: dict[tuple[str, float], Engine] = {}
+# Database check still running in the threadpool, at most one at a time
+_check: asyncio.Future | None = None
+
+
+def reset() -> None:
+    """Forget the cached readiness result, called when an app starts"""
+    global _last_checked, _last_result, _check
+    _last_checked, _last_result, _check = 0.0, None, None
+
+
+def pool_stats(engine: Engine) -> dict:
+    """Return the connection counts and checkout waits of an engine's pool
+
+    Pools without a fixed size, such as the one used for SQLite, only
+    report their class and checkout waits.
+    """
+    pool = engine.pool
+    stats = {"class": type(pool).__name__}
+    if hasattr(pool, "checkout_wait"):
+        stats["checkout_wait"] = pool.checkout_wait.stats()
+    if hasattr(pool, "checkedout"):
+        size = pool.size()
+        # A negative max_overflow means the pool never runs out
+        max_overflow = getattr(pool, "_max_overflow", 0)
+        stats.update(
+            size=size,
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            capacity=size + max_overflow if max_overflow >= 0 else None,
+        )
+    return stats
+
+
+def probe_connect_args(url: URL, timeout: float) -> dict:
+    """Connection arguments making the driver give up after timeout seconds"""
+    backend = url.get_backend_name()
+    seconds = max(math.ceil(timeout), 1)
+    if backend == "postgresql":
+        return {
+            # libpq rounds connect timeouts below 2 seconds up to 2
+            "connect_timeout": max(seconds, 2),
+            "options": f"-c statement_timeout={int(timeout * 1000)}",
+        }
+    if backend == "mysql":
+        return {"connect_timeout": seconds, "read_timeout": seconds}
+    if backend == "sqlite":
+        return {"timeout": timeout}
+    return {}
+
+
+def probe_engine(engine: Engine) -> Engine:
+    """Return an engine for health checks of the database behind engine
+
+    It has no pool, so a check never queues behind requests for a pooled
+    connection, and its connections time out after
+    HEALTH_DB_TIMEOUT_SECONDS, so a hung database can't hold the thread for
+    the full pool or driver timeout.
+    """
+    timeout = get_settings().HEALTH_DB_TIMEOUT_SECONDS
+    key = (str(engine.url), timeout)
+    probe = _probe_engines.get(key)
+    if probe is None:
+        probe = create_engine(
+            engine.url,
+            poolclass=NullPool,
+            connect_args=probe_connect_args(engine.url, timeout),
+        )
+        _probe_engines[key] = probe
+    return probe
+
+
+def check_database(engine: Engine) -> float:
+    """Connect, run SELECT 1 and return the seconds it took"""
+    started = time.perf_counter()
+    with engine.connect() as connection:
+        connection.execute(sa.text("SELECT 1"))
+    return time.perf_counter() - started
+
+
+async def check_primary(timeout: float) -> float:
+    """Run check_database on the primary in the threadpool
+
+    A check still running after an earlier timeout is awaited instead of
+    starting another one, so a hung database holds at most one thread.
+
+    Raises:
+        asyncio.TimeoutError: If the check takes longer than timeout
+    """
+    global _check
+    if (
+        _check is None
+        or _check.done()
+        # Left behind by an app that was shut down with the check running
+        or _check.get_loop() is not asyncio.get_running_loop()
+    ):
+        _check = asyncio.ensure_future(
+            run_in_threadpool(check_database, probe_engine(get_engine()))
+        )
+    return await asyncio.wait_for(asyncio.shield(_check), timeout)
+
+
+async def check_readiness() -> tuple[bool, dict]:
+    settings = get_settings()
+    engines = get_engines()
+    pools = {name: pool_stats(engine) for name, engine in engines.items()}
+    primary = pools["primary"]
+    ready = True
+    report = {}
+
+    capacity = primary.get("capacity")
+    if capacity is not None and primary["checked_out"] >= capacity:
+        # Don't wait for a connection behind the requests already queued
+        ready = False
+        report["database"] = {"status": "saturated"}
+    else:
+        try:
+            latency = await check_primary(settings.HEALTH_DB_TIMEOUT_SECONDS)
+            report["database"] = {
+                "status": "ok",
+                "latency_ms": round(latency * 1000, 2),
+            }
+        except asyncio.TimeoutError:
+            ready = False
+            report["database"] = {"status": "timeout"}
+        except Exception as e:
+            logger.warning(f"Readiness check failed: {e}")
+            ready = False
+            report["database"] = {"status": "error", "error": type(e).__name__}
+
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    report.update(
+        pools=pools,
+        threadpool={
+            "borrowed": limiter.borrowed_tokens,
+            "total": limiter.total_tokens,
+        },
+        executors=executors.stats(),
+        events=events.hub.stats(),
+        caches={name: cache.stats() for name, cache in get_caches().items()},
+    )
+    return ready, report
+
+
+@router.get("/live")
+async def live():
+    """Liveness probe, succeeds as long as the process serves requests"""
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+async def ready():
+    """Readiness probe checking the database and reporting resource usage
+
+    Results are reused for HEALTH_CACHE_SECONDS and concurrent probes share
+    one check, so polling every second adds no load. Returns 503 when the
+    database is unreachable, slow or its pool is exhausted.
+    """
+    global _last_checked, _last_result
+    async with _lock:
+        now = time.monotonic()
+        if (
+            _last_result is None
+            or now - _last_checked >= get_settings().HEALTH_CACHE_SECONDS
+        ):
+            _last_result = await check_readiness()
+            _last_checked = time.monotonic()
+        is_ready, report = _last_result
+    return JSONResponse(
+        {"status": "ok" if is_ready else "unavailable", **report},
+        status_code=200 if is_ready else 503,
+    )
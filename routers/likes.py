@@ -1,25 +1,41 @@
+import sqlalchemy as sa
 from fastapi import APIRouter, Depends, HTTPException, Response, status
 from loguru import logger
 from sqlalchemy.orm import Session
 
 from dependencies import get_db
+from idempotency import idempotent
 from models.blog import Blog
 from models.like import Like
 from models.user import User
+from services import events
 from services.auth import Auth
-from utils import get_object_or_404
+from utils import get_object_or_404, insert_ignore
 
-router = APIRouter(prefix="/api/likes", tags=["Likes"])
+router = APIRouter(prefix="/likes", tags=["Likes"])
+
+
+def publish_like_count(db: Session, blog_id: int) -> None:
+    """Send the current like count of a blog to its event subscribers
+
+    The count is only queried when someone is subscribed.
+    """
+    topic = events.blog_topic(blog_id)
+    if not events.has_subscribers(topic):
+        return
+    likes = db.query(sa.func.count(Like.id)).filter(Like.post_id == blog_id).scalar()
+    events.publish(topic, "likes", {"blog_id": blog_id, "likes": likes})
 
 
 @router.post("/{blog_id}")
+@idempotent
 def like_post(
     blog_id: int,
     db: Session = Depends(get_db),
     user: User = Depends(Auth.get_current_user),
 ):
     """Like a given post if not already liked else remove the like"""
-    blog = get_object_or_404(Blog, blog_id)
+    blog = get_object_or_404(db, Blog, blog_id)
     is_already_liked = (
         db.query(Like).filter(Like.post_id == blog_id, Like.user_id == user.id).first()
     )
@@ -27,11 +43,48 @@ def like_post(
         logger.info(f"User: {user} has already liked blog: {blog}. Removing like")
         db.delete(is_already_liked)
         db.commit()
+        publish_like_count(db, blog_id)
         return "Removed like"
 
     logger.info(f"User: {user} liked blog: {blog}")
     like = Like(post_id=blog_id, user_id=user.id)
     db.add(like)
     db.commit()
+    publish_like_count(db, blog_id)
 
     return Response(status_code=status.HTTP_201_CREATED, content="Like added")
+
+
+@router.put("/{blog_id}", status_code=status.HTTP_204_NO_CONTENT)
+def add_like(
+    blog_id: int,
+    db: Session = Depends(get_db),
+    user: User = Depends(Auth.get_current_user),
+):
+    """Like a given post, doing nothing if already liked"""
+    get_object_or_404(db, Blog, blog_id)
+    added = insert_ignore(db, Like, {"post_id": blog_id, "user_id": user.id})
+    db.commit()
+    if added:
+        logger.info(f"User: {user} liked blog: {blog_id}")
+        publish_like_count(db, blog_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.delete("/{blog_id}", status_code=status.HTTP_204_NO_CONTENT)
+def remove_like(
+    blog_id: int,
+    db: Session = Depends(get_db),
+    user: User = Depends(Auth.get_current_user),
+):
+    """Remove the like of a given post, doing nothing if not liked"""
+    removed = (
+        db.query(Like)
+        .filter(Like.post_id == blog_id, Like.user_id == user.id)
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    if removed:
+        logger.info(f"User: {user} removed like from blog: {blog_id}")
+        publish_like_count(db, blog_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,162 @@
+import mimetypes
+import os
+import re
+import stat
+
+import anyio
+from fastapi import APIRouter, HTTPException, Request, status
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from services.storage import LocalStorage, get_storage
+
+router = APIRouter(tags=["Media"])
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class MediaFileResponse(Response):
+    """Serve a byte range of an immutable file
+
+    Uses the zerocopysend ASGI extension when the server offers it and
+    falls back to chunked reads otherwise.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(
+        self,
+        path: str,
+        start: int,
+        end: int,
+        size: int,
+        media_type: str,
+        method: str,
+    ):
+        self.path = path
+        self.start = start
+        self.end = end
+        self.send_header_only = method == "HEAD"
+        partial = end - start + 1 != size
+        self.status_code = (
+            status.HTTP_206_PARTIAL_CONTENT if partial else status.HTTP_200_OK
+        )
+        self.media_type = media_type
+        self.background = None
+        headers = {
+            "accept-ranges": "bytes",
+            "cache-control": "public, max-age=31536000, immutable",
+            "content-length": str(end - start + 1),
+        }
+        if partial:
+            headers["content-range"] = f"bytes {start}-{end}/{size}"
+        self.init_headers(headers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+        if self.send_header_only:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        count = self.end - self.start + 1
+        if count == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if "http.response.zerocopysend" in scope.get("extensions", {}):
+            with open(self.path, "rb") as file:
+                await send(
+                    {
+                        "type": "http.response.zerocopysend",
+                        "file": file,
+                        "offset": self.start,
+                        "count": count,
+                    }
+                )
+            return
+
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.start)
+            while count > 0:
+                chunk = await file.read(min(self.chunk_size, count))
+                count -= len(chunk)
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": chunk,
+                        "more_body": count > 0 and bool(chunk),
+                    }
+                )
+                if not chunk:
+                    break
+
+
+def parse_range(range_header: str, size: int) -> tuple[int, int]:
+    """Parse a single range of a Range header
+
+    Args:
+        range_header (str): Value of the Range header
+        size (int): Size of the file
+
+    Raises:
+        HTTPException: If the range can not be satisfied
+
+    Returns:
+        tuple[int, int]: First and last byte of the range, inclusive
+    """
+    unsatisfiable = HTTPException(
+        status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+        headers={"content-range": f"bytes */{size}"},
+    )
+    match = RANGE_RE.match(range_header.strip())
+    if not match or match.groups() == ("", ""):
+        raise unsatisfiable
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise unsatisfiable
+    return start, end
+
+
+@router.api_route("/{name}", methods=["GET", "HEAD"])
+async def get_media(name: str, request: Request):
+    """Serve a stored file, supporting single range requests"""
+    storage = get_storage()
+    if not isinstance(storage, LocalStorage):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    try:
+        path = storage.path(name)
+        stat_result = await anyio.to_thread.run_sync(os.stat, path)
+    except (ValueError, FileNotFoundError):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="File not found"
+        )
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="File not found"
+        )
+
+    size = stat_result.st_size
+    start, end = 0, size - 1
+    if "range" in request.headers:
+        start, end = parse_range(request.headers["range"], size)
+
+    return MediaFileResponse(
+        path,
+        start,
+        end,
+        size,
+        media_type=mimetypes.guess_type(name)[0] or "application/octet-stream",
+        method=request.method,
+    )
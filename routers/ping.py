@@ -1,8 +1,6 @@
 from fastapi import APIRouter
 
-from settings import settings
-
-router = APIRouter(prefix=settings.API_ENTRYPOINT, tags=["Default"])
+router = APIRouter(tags=["Default"])
 
 
 @router.get("/ping")
@@ -0,0 +1,28 @@
+import secrets
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+
+import profiling
+from settings import get_settings
+
+router = APIRouter(prefix="/debug", tags=["Default"])
+
+
+async def check_profiling_token(x_profiling_token: str | None = Header(default=None)):
+    """Allow only requests carrying PROFILING_TOKEN in X-Profiling-Token"""
+    expected = get_settings().PROFILING_TOKEN
+    if (
+        not expected
+        or x_profiling_token is None
+        or not secrets.compare_digest(x_profiling_token, expected)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid profiling token",
+        )
+
+
+@router.get("/profiles", dependencies=[Depends(check_profiling_token)])
+async def get_profiles(limit: int = Query(default=10, ge=1, le=100)):
+    """Slowest recently profiled requests with their stacks in collapsed format"""
+    return {"profiles": [p.as_dict() for p in profiling.profiler.slowest(limit)]}
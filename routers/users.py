@@ -1,33 +1,119 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Form
+import os
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Form,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+    status,
+)
 from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
 from fastapi.security import OAuth2PasswordRequestForm
 from loguru import logger
 from sqlalchemy.orm import Session
 
-from dependencies import get_db
+from dependencies import get_db, get_read_db
+from idempotency import idempotent
 from models.blog import Blog
 from models.user import User
+from schemas.blog import BlogPage
 from schemas.user import (
     UserBlogs,
     UserCreate,
     UserOut,
+    RefreshToken,
     SendPasswordReset,
     ResetPassword,
 )
+from services import executors
 from services.auth import Auth
-from settings import settings
+from services.author_blogs import MAX_PAGE_SIZE, AuthorBlogs
+from services.images import InvalidImageError, make_thumbnails
+from services.sessions import Sessions
+from services.storage import get_storage
+from settings import get_settings
+
+router = APIRouter(prefix="/users", tags=["User"])
+
+# Room for the multipart boundaries and part headers around the image
+MULTIPART_OVERHEAD = 16 * 1024
+
+
+def image_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail="Image too large",
+    )
+
+
+class ProfileImageRoute(APIRoute):
+    """Rejects uploads by their Content-Length before the body is read
+
+    FastAPI reads and spools the whole form before the endpoint runs, so
+    the endpoint's own size check only stops uploads sent without a
+    Content-Length after they were received.
+    """
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
 
-router = APIRouter(prefix=f"{settings.API_ENTRYPOINT}/users", tags=["User"])
+        async def check_content_length(request: Request) -> Response:
+            length = request.headers.get("content-length", "")
+            max_bytes = get_settings().PROFILE_IMAGE_MAX_BYTES + MULTIPART_OVERHEAD
+            if length.isdigit() and int(length) > max_bytes:
+                raise image_too_large()
+            return await handler(request)
+
+        return check_content_length
 
 
 @router.get("/", response_model=UserBlogs)
-def get_me(db: Session = Depends(get_db), user: User = Depends(Auth.get_current_user)):
+def get_me(
+    db: Session = Depends(get_read_db), user: User = Depends(Auth.get_current_user)
+):
     """Get data about currently logged in user"""
-    result = db.query(Blog).filter(Blog.user_id == user.id).all()
+    result = (
+        db.query(Blog).filter(Blog.user_id == user.id, Blog.deleted_at.is_(None)).all()
+    )
     return UserBlogs(username=user.username, blogs=result, profile_img=user.profile_img)
 
 
+@router.get("/{username}/blogs", response_model=BlogPage)
+def get_user_blogs(
+    username: str,
+    limit: int = Query(
+        default=10,
+        description="Number of blogs to retrieve",
+        ge=1,
+        le=MAX_PAGE_SIZE,
+    ),
+    cursor: str
+    | None = Query(default=None, description="next_cursor of the previous page"),
+    db: Session = Depends(get_read_db),
+):
+    """Get the blogs of a user, newest first"""
+    try:
+        page = AuthorBlogs.page(db, username, limit, cursor)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+    if page is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+        )
+    blogs, next_cursor = page
+    return BlogPage(blogs=blogs, next_cursor=next_cursor)
+
+
 @router.post("/create", response_model=UserOut)
+@idempotent
 def create_user(user: UserCreate, db: Session = Depends(get_db)):
     """Create a new user if username does not exist in the database"""
 
@@ -48,6 +134,55 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)):
     return new_user
 
 
+def upload_profile_image(
+    image: UploadFile = File(),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(Auth.get_current_user),
+):
+    """Upload a profile image for currently logged in user
+
+    The upload spooled by the form parser is resized into thumbnails in the
+    process pool and stored under content hashed names.
+    """
+    settings = get_settings()
+    image.file.seek(0, os.SEEK_END)
+    size = image.file.tell()
+    if size > settings.PROFILE_IMAGE_MAX_BYTES:
+        raise image_too_large()
+    image.file.seek(0)
+
+    logger.info(f"Resizing profile image of {size} bytes for {current_user}")
+    try:
+        # A spooled upload has no path the spawned workers could open
+        thumbnails = executors.submit(
+            make_thumbnails, image.file.read(), settings.PROFILE_IMAGE_SIZES
+        ).result()
+    except InvalidImageError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid image"
+        )
+
+    storage = get_storage()
+    for name, data in thumbnails.values():
+        storage.save(name, data)
+
+    user = db.query(User).get(current_user.id)
+    user.profile_img = storage.url(thumbnails[max(thumbnails)][0])
+    db.commit()
+    db.refresh(user)
+    logger.info(f"Profile image updated for user: {user}")
+    return user
+
+
+router.add_api_route(
+    "/profile-image",
+    upload_profile_image,
+    methods=["POST"],
+    response_model=UserOut,
+    route_class_override=ProfileImageRoute,
+)
+
+
 @router.post("/token")
 def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
     """Return a access token if valid data"""
@@ -63,7 +198,31 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
         )
 
     access_token = Auth.create_jwt_token({"sub": user.username})
-    return {"access_token": access_token, "token_type": "bearer"}
+    refresh_token = Sessions.start(user)
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+    }
+
+
+@router.post("/token/refresh")
+def refresh_access_token(token: RefreshToken):
+    """Return a new access token and rotate the refresh token"""
+    user, refresh_token = Sessions.rotate(token.refresh_token)
+    access_token = Auth.create_jwt_token({"sub": user.username})
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+    }
+
+
+@router.post("/token/revoke")
+def revoke_refresh_token(token: RefreshToken):
+    """Revoke a refresh token"""
+    Sessions.revoke(token.refresh_token)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
 @router.post("/change-password")
@@ -86,6 +245,7 @@ def change_password(
     logger.info(f"Changing password for user {current_user}")
     user = db.query(User).get(current_user.id)
     user.password = Auth.create_hash_password(new_password)
+    Sessions.revoke_all(db, user.id)
     db.commit()
     return {"msg": "Password changed"}
 
@@ -101,7 +261,7 @@ def get_password_reset_token(user: SendPasswordReset, db: Session = Depends(get_
         )
     token = Auth.get_password_reset_token(
         user_id=user.id,
-        token_expiry_in_hours=settings.PASSWORD_RESET_TOKEN_EXPIRY_HOURS,
+        token_expiry_in_hours=get_settings().PASSWORD_RESET_TOKEN_EXPIRY_HOURS,
     )
     return {"reset_token": token}
 
@@ -1,15 +1,78 @@
+from datetime import datetime
+
 import pydantic
 
+from models.tag import TAG_NAME_LENGTH
+
+MAX_TAGS = 10
+
 
 class BlogCreate(pydantic.BaseModel):
     title: str
     content: str
+    tags: list[str] = []
+
+    @pydantic.validator("tags")
+    @classmethod
+    def validate_tags(cls, v):
+        tags = list(dict.fromkeys(tag.strip().lower() for tag in v if tag.strip()))
+        if len(tags) > MAX_TAGS:
+            raise ValueError(f"A blog can have at most {MAX_TAGS} tags")
+        if any(len(tag) > TAG_NAME_LENGTH for tag in tags):
+            raise ValueError(f"Tags exceed {TAG_NAME_LENGTH} characters")
+        return tags
+
+
+class BlogUpdate(BlogCreate):
+    # Tags are left unchanged when omitted
+    tags: list[str] | None = None
+
+    @pydantic.validator("tags")
+    @classmethod
+    def validate_tags(cls, v):
+        return None if v is None else BlogCreate.validate_tags(v)
 
 
 class BlogOut(pydantic.BaseModel):
     id: int
     title: str
     content: str
+    tags: list[str] = []
+
+    @pydantic.validator("tags", pre=True)
+    @classmethod
+    def validate_tags(cls, v):
+        return [getattr(tag, "name", tag) for tag in v]
+
+    class Config:
+        orm_mode = True
+
+
+class BlogDetailOut(BlogOut):
+    # Left out when the body is stored compressed, read it from content_url
+    content: str | None
+    content_url: str
+
+
+class BlogSummaryOut(pydantic.BaseModel):
+    id: int
+    title: str
+    summary: str
+    views: int
+    created_at: datetime
+
+    class Config:
+        orm_mode = True
+
+
+class BlogPage(pydantic.BaseModel):
+    blogs: list[BlogSummaryOut]
+    next_cursor: str | None
+
+
+class TagOut(pydantic.BaseModel):
+    name: str
+    blog_count: int
 
     class Config:
         orm_mode = True
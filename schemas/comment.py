@@ -6,6 +6,7 @@ class CommentOut(pydantic.BaseModel):
     content: str
     post_id: int
     user_id: int
+    parent_id: int | None
 
     class Config:
         orm_mode = True
@@ -13,3 +14,16 @@ class CommentOut(pydantic.BaseModel):
 
 class CommentCreate(pydantic.BaseModel):
     content: str
+    parent_id: int | None = None
+
+
+class CommentThread(CommentOut):
+    reply_count: int
+    replies: list[CommentOut]
+
+
+class CommentTree(CommentOut):
+    replies: list["CommentTree"] = []
+
+
+CommentTree.update_forward_refs()
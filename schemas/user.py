@@ -1,6 +1,6 @@
 import pydantic
 
-from schemas.blog import BlogOut
+from schemas.blog import BlogSummaryOut
 
 
 class UserCreate(pydantic.BaseModel):
@@ -34,7 +34,7 @@ class UserOut(pydantic.BaseModel):
 
 
 class UserBlogs(UserOut):
-    blogs: list[BlogOut]
+    blogs: list[BlogSummaryOut]
 
     class Config:
         orm_mode = True
@@ -51,3 +51,7 @@ class SendPasswordReset(pydantic.BaseModel):
 
 class ResetPassword(pydantic.BaseModel):
     password: str
+
+
+class RefreshToken(pydantic.BaseModel):
+    refresh_token: str
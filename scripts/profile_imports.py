@@ -0,0 +1,71 @@
+"""Report import time of the application
+
+Runs a fresh interpreter with `-X importtime` for each stage of startup and
+prints the total time together with the slowest modules.
+
+Usage:
+    python scripts/profile_imports.py [--top 15]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STAGES = {
+    "import main": "import main",
+    "create_app()": "import main; main.create_app()",
+}
+
+
+def profile(code: str) -> list[tuple[int, int, str]]:
+    """Run code in a new interpreter and collect its import times
+
+    Args:
+        code (str): Python source to run
+
+    Returns:
+        list[tuple[int, int, str]]: (self us, cumulative us, module) per import
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(result.stderr)
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:") :].split("|")
+        rows.append((int(self_us), int(cumulative_us), module[1:].rstrip()))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--top", type=int, default=15, help="Modules to list")
+    args = parser.parse_args()
+
+    for stage, code in STAGES.items():
+        rows = profile(code)
+        # Nested imports are indented, top level ones are not
+        total = sum(
+            cumulative for _, cumulative, module in rows if not module.startswith(" ")
+        )
+        print(f"{stage}: {total / 1000:.1f} ms, {len(rows)} modules")
+        for self_us, cumulative_us, module in sorted(rows, key=lambda r: -r[1])[
+            : args.top
+        ]:
+            print(
+                f"  {cumulative_us / 1000:8.1f} ms  {self_us / 1000:8.1f} ms  {module}"
+            )
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""Export tables to NDJSON files or import them back
+
+Rows are streamed in primary key order, one JSON object per line and one
+file per table, so memory use does not grow with the size of a table.
+Progress is checkpointed after every batch and an interrupted run picks up
+where it stopped when started again with --resume.
+
+Usage:
+    python scripts/transfer.py export backup/ [--tables users blogs]
+    python scripts/transfer.py import backup/ [--resume] [--copy]
+"""
+import argparse
+import base64
+import csv
+import io
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Iterator
+
+import sqlalchemy as sa
+from sqlalchemy.engine import Connection, Engine
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from db import build_engine
+from models.blog import Blog
+from models.comment import Comment
+from models.like import Like
+from models.user import User
+from settings import get_settings
+
+# In foreign key order, so every row is imported after the rows it references
+TABLES = {model.__tablename__: model.__table__ for model in (User, Blog, Comment, Like)}
+
+
+class Progress:
+    """Prints the number of rows handled and the rate for a table"""
+
+    def __init__(self, table: str, action: str, done: int = 0):
+        self.table = table
+        self.action = action
+        self.done = done
+        self.started = time.monotonic()
+        self.counted = 0
+
+    def update(self, rows: int) -> None:
+        self.done += rows
+        self.counted += rows
+        elapsed = time.monotonic() - self.started
+        rate = self.counted / elapsed if elapsed else 0.0
+        print(
+            f"{self.table}: {self.action} {self.done} rows ({rate:.0f} rows/s)",
+            file=sys.stderr,
+        )
+
+
+class Checkpoint:
+    """Last primary key and file offset handled for a table
+
+    Written after each committed batch and marked done once the whole
+    table is handled, so --resume skips it.
+    """
+
+    def __init__(self, directory: str, table: str, action: str):
+        self.path = os.path.join(directory, f"{table}.{action}.checkpoint")
+
+    def load(self) -> dict | None:
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path) as f:
+            return json.load(f)
+
+    def save(self, state: dict) -> None:
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    def finish(self, state: dict) -> None:
+        self.save({**state, "done": True})
+
+
+def encode_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode()
+    return value
+
+
+def decode_row(table: sa.Table, row: dict) -> dict:
+    """Convert JSON values back to the python types of the table's columns"""
+    for column in table.columns:
+        value = row.get(column.name)
+        if value is None:
+            continue
+        if isinstance(column.type, sa.DateTime):
+            row[column.name] = datetime.fromisoformat(value)
+        elif isinstance(column.type, sa.LargeBinary):
+            row[column.name] = base64.b64decode(value)
+    return row
+
+
+def primary_key(table: sa.Table) -> sa.Column:
+    return table.primary_key.columns.values()[0]
+
+
+def export_table(
+    engine: Engine, table: sa.Table, directory: str, batch_size: int, resume: bool
+) -> None:
+    """Write every row of a table to <directory>/<table>.ndjson
+
+    Args:
+        engine (Engine): Engine to read from
+        table (sa.Table): Table to export
+        directory (str): Directory of the NDJSON files
+        batch_size (int): Rows fetched from the server at a time
+        resume (bool): Continue after the last checkpoint instead of starting over
+    """
+    pk = primary_key(table)
+    path = os.path.join(directory, f"{table.name}.ndjson")
+    checkpoint = Checkpoint(directory, table.name, "export")
+    state = checkpoint.load() if resume else None
+    if state is None:
+        state = {"last_pk": None, "offset": 0, "rows": 0}
+    elif state.get("done"):
+        print(f"{table.name}: already exported", file=sys.stderr)
+        return
+
+    statement = sa.select(table).order_by(pk)
+    if state["last_pk"] is not None:
+        statement = statement.where(pk > state["last_pk"])
+    progress = Progress(table.name, "exported", state["rows"])
+
+    with open(path, "a+b") as f, engine.connect() as connection:
+        # Drop anything written after the last checkpoint
+        f.truncate(state["offset"])
+        f.seek(state["offset"])
+        result = connection.execution_options(yield_per=batch_size).execute(statement)
+        for rows in result.mappings().partitions():
+            f.write(
+                b"".join(
+                    json.dumps({k: encode_value(v) for k, v in row.items()}).encode()
+                    + b"\n"
+                    for row in rows
+                )
+            )
+            f.flush()
+            state = {
+                "last_pk": rows[-1][pk.name],
+                "offset": f.tell(),
+                "rows": state["rows"] + len(rows),
+            }
+            checkpoint.save(state)
+            progress.update(len(rows))
+    checkpoint.finish(state)
+
+
+def read_batches(
+    path: str, table: sa.Table, batch_size: int, offset: int
+) -> Iterator[tuple[list[dict], int]]:
+    """Yield batches of rows and the file offset right after each batch"""
+    batch = []
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for line in f:
+            batch.append(decode_row(table, json.loads(line)))
+            if len(batch) == batch_size:
+                yield batch, f.tell()
+                batch = []
+        if batch:
+            yield batch, f.tell()
+
+
+def copy_value(value) -> str:
+    if value is None:
+        return r"\N"
+    if isinstance(value, bytes):
+        return "\\x" + value.hex()
+    return value
+
+
+def copy_rows(connection: Connection, table: sa.Table, rows: list[dict]) -> None:
+    """Load rows with PostgreSQL's COPY, much faster than INSERT"""
+    columns = [column.name for column in table.columns]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([copy_value(row.get(name)) for name in columns])
+    buffer.seek(0)
+    cursor = connection.connection.cursor()
+    cursor.copy_expert(
+        f"COPY {table.name} ({', '.join(columns)}) FROM STDIN "
+        r"WITH (FORMAT csv, NULL '\N')",
+        buffer,
+    )
+
+
+def import_table(
+    engine: Engine,
+    table: sa.Table,
+    directory: str,
+    batch_size: int,
+    resume: bool,
+    copy: bool,
+) -> None:
+    """Insert the rows of <directory>/<table>.ndjson, a batch per transaction
+
+    Args:
+        engine (Engine): Engine to write to
+        table (sa.Table): Table to import into
+        directory (str): Directory of the NDJSON files
+        batch_size (int): Rows per transaction
+        resume (bool): Skip rows imported before the last checkpoint and
+            rows whose primary key is already in the table
+        copy (bool): Use COPY instead of executemany on PostgreSQL
+    """
+    path = os.path.join(directory, f"{table.name}.ndjson")
+    if not os.path.exists(path):
+        print(f"{table.name}: {path} not found, skipping", file=sys.stderr)
+        return
+    pk = primary_key(table)
+    checkpoint = Checkpoint(directory, table.name, "import")
+    state = checkpoint.load() if resume else None
+    if state is None:
+        state = {"last_pk": None, "offset": 0, "rows": 0}
+    elif state.get("done"):
+        print(f"{table.name}: already imported", file=sys.stderr)
+        return
+    progress = Progress(table.name, "imported", state["rows"])
+    use_copy = copy and engine.dialect.name == "postgresql"
+    # Rows are in primary key order, so a batch committed just before the
+    # process died, without its checkpoint, is skipped by primary key
+    imported_pk = None
+    if resume:
+        with engine.connect() as connection:
+            imported_pk = connection.execute(sa.select(sa.func.max(pk))).scalar()
+
+    for rows, offset in read_batches(path, table, batch_size, state["offset"]):
+        if imported_pk is not None:
+            rows = [row for row in rows if row[pk.name] > imported_pk]
+        if not rows:
+            state = {**state, "offset": offset}
+            checkpoint.save(state)
+            continue
+        with engine.begin() as connection:
+            if use_copy:
+                copy_rows(connection, table, rows)
+            else:
+                connection.execute(table.insert(), rows)
+        state = {
+            "last_pk": rows[-1][pk.name],
+            "offset": offset,
+            "rows": state["rows"] + len(rows),
+        }
+        checkpoint.save(state)
+        progress.update(len(rows))
+
+    if engine.dialect.name == "postgresql":
+        # Rows were inserted with explicit ids, move the sequence past them
+        with engine.begin() as connection:
+            connection.execute(
+                sa.text(
+                    f"SELECT setval(pg_get_serial_sequence('{table.name}', "
+                    f"'{pk.name}'), COALESCE(MAX({pk.name}), 1)) FROM {table.name}"
+                )
+            )
+    checkpoint.finish(state)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("action", choices=["export", "import"])
+    parser.add_argument("directory", help="Directory of the NDJSON files")
+    parser.add_argument(
+        "--tables",
+        nargs="+",
+        choices=list(TABLES),
+        default=list(TABLES),
+        help="Tables to transfer",
+    )
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument(
+        "--resume", action="store_true", help="Continue from the last checkpoint"
+    )
+    parser.add_argument(
+        "--copy", action="store_true", help="Import with COPY on PostgreSQL"
+    )
+    parser.add_argument(
+        "--database-url", help="Database to use instead of DATABASE_URL"
+    )
+    args = parser.parse_args()
+
+    engine = build_engine(args.database_url or get_settings().DATABASE_URL)
+    os.makedirs(args.directory, exist_ok=True)
+    tables = [TABLES[name] for name in TABLES if name in args.tables]
+    started = time.monotonic()
+    for table in tables:
+        if args.action == "export":
+            export_table(engine, table, args.directory, args.batch_size, args.resume)
+        else:
+            import_table(
+                engine,
+                table,
+                args.directory,
+                args.batch_size,
+                args.resume,
+                args.copy,
+            )
+    print(f"Done in {time.monotonic() - started:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
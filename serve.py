@@ -0,0 +1,165 @@
+"""Production server entry point
+
+Binds one listening socket and runs a pool of uvicorn workers on it. Workers
+are spawned, not forked, so every worker builds its own engine and executors
+on startup. A worker that exits after serving its request limit is replaced,
+and SIGTERM/SIGINT drains every worker before exiting.
+
+Usage:
+    python serve.py [--host HOST] [--port PORT] [--workers N] ...
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import time
+
+import uvicorn
+from loguru import logger
+
+from settings import get_settings
+
+spawn = multiprocessing.get_context("spawn")
+
+
+def run_worker(config_kwargs: dict, sock: socket.socket) -> None:
+    """Serve the application on an already bound socket
+
+    Args:
+        config_kwargs (dict): Keyword arguments for uvicorn.Config
+        sock (socket.socket): Listening socket shared by all workers
+    """
+    config = uvicorn.Config("main:create_app", factory=True, **config_kwargs)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class Supervisor:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.workers: list[multiprocessing.Process] = []
+        self.should_exit = False
+
+    def config_kwargs(self) -> dict:
+        """Build uvicorn settings for a new worker
+
+        Returns:
+            dict: Keyword arguments for uvicorn.Config
+        """
+        limit_max_requests = None
+        if self.args.max_requests:
+            # Jitter keeps workers from recycling all at once
+            limit_max_requests = self.args.max_requests + random.randint(
+                0, self.args.max_requests_jitter
+            )
+        return {
+            "timeout_keep_alive": self.args.keep_alive,
+            "limit_max_requests": limit_max_requests,
+            "proxy_headers": True,
+        }
+
+    def spawn_worker(self, sock: socket.socket) -> None:
+        worker = spawn.Process(target=run_worker, args=(self.config_kwargs(), sock))
+        worker.start()
+        logger.info(f"Started worker {worker.pid}")
+        self.workers.append(worker)
+
+    def handle_exit(self, sig, frame) -> None:
+        logger.info(f"Received {signal.Signals(sig).name}, draining workers")
+        self.should_exit = True
+
+    def shutdown(self) -> None:
+        """Ask every worker to drain and kill the ones that do not finish in time"""
+        for worker in self.workers:
+            if worker.is_alive():
+                os.kill(worker.pid, signal.SIGTERM)
+
+        deadline = time.monotonic() + self.args.graceful_timeout
+        for worker in self.workers:
+            worker.join(max(deadline - time.monotonic(), 0))
+            if worker.is_alive():
+                logger.warning(f"Worker {worker.pid} did not drain in time, killing")
+                worker.kill()
+                worker.join()
+
+    def run(self) -> None:
+        config = uvicorn.Config(
+            "main:create_app",
+            factory=True,
+            host=self.args.host,
+            port=self.args.port,
+            backlog=self.args.backlog,
+        )
+        sock = config.bind_socket()
+
+        signal.signal(signal.SIGTERM, self.handle_exit)
+        signal.signal(signal.SIGINT, self.handle_exit)
+
+        logger.info(
+            f"Serving on {self.args.host}:{self.args.port} with {self.args.workers} workers"
+        )
+        for _ in range(self.args.workers):
+            self.spawn_worker(sock)
+
+        while not self.should_exit:
+            for worker in list(self.workers):
+                if worker.is_alive():
+                    continue
+                logger.info(f"Worker {worker.pid} exited with code {worker.exitcode}")
+                self.workers.remove(worker)
+                if not self.should_exit:
+                    self.spawn_worker(sock)
+            time.sleep(0.5)
+
+        self.shutdown()
+        sock.close()
+        logger.info("All workers stopped")
+
+
+def parse_args() -> argparse.Namespace:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Run the API with several workers")
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.SERVER_WORKERS or os.cpu_count() or 1,
+        help="Number of worker processes, defaults to the number of cores",
+    )
+    parser.add_argument(
+        "--keep-alive",
+        type=int,
+        default=settings.SERVER_KEEP_ALIVE_SECONDS,
+        help="Seconds to keep idle connections open",
+    )
+    parser.add_argument(
+        "--backlog",
+        type=int,
+        default=settings.SERVER_BACKLOG,
+        help="Maximum number of pending connections",
+    )
+    parser.add_argument(
+        "--max-requests",
+        type=int,
+        default=settings.SERVER_MAX_REQUESTS,
+        help="Requests a worker serves before it is replaced, 0 to disable",
+    )
+    parser.add_argument(
+        "--max-requests-jitter",
+        type=int,
+        default=settings.SERVER_MAX_REQUESTS_JITTER,
+        help="Random extra requests added to --max-requests per worker",
+    )
+    parser.add_argument(
+        "--graceful-timeout",
+        type=int,
+        default=settings.SERVER_GRACEFUL_TIMEOUT_SECONDS,
+        help="Seconds to wait for workers to drain on shutdown",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    Supervisor(parse_args()).run()
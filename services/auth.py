@@ -3,20 +3,45 @@ from datetime import datetime, timedelta
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
 from loguru import logger
 from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 
-from db import engine
+from db import get_engine
 from models.user import User, ResetPassword
-from settings import settings
+from services import tokens
+from services.sessions import Sessions
+from settings import Settings, get_settings
+from utils import delete_in_batches, hash_token
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/users/token")
 
 
 class Auth:
-    pwd_context = CryptContext(schemes=[settings.HASH_ALGORITHM], deprecated="auto")
+    _pwd_context: CryptContext | None = None
+
+    @classmethod
+    def configure(cls, settings: Settings) -> None:
+        """Build the password context and JWT backend for the given settings
+
+        Args:
+            settings (Settings): Settings to read the hash and JWT options from
+        """
+        cls._pwd_context = CryptContext(
+            schemes=[settings.HASH_ALGORITHM], deprecated="auto"
+        )
+        tokens.configure(settings)
+
+    @classmethod
+    def get_pwd_context(cls) -> CryptContext:
+        """Return the password context, building it on first use
+
+        Returns:
+            CryptContext: Password context for the configured hash algorithm
+        """
+        if cls._pwd_context is None:
+            cls.configure(get_settings())
+        return cls._pwd_context
 
     @classmethod
     def create_hash_password(cls, plain_password: str) -> str:
@@ -29,7 +54,7 @@ class Auth:
             str: Hashed password
         """
         logger.info("Creating a hash password")
-        return cls.pwd_context.hash(plain_password)
+        return cls.get_pwd_context().hash(plain_password)
 
     @classmethod
     def verify_password(cls, plain_password, hashed_password) -> bool:
@@ -43,7 +68,7 @@ class Auth:
             bool: True if verified
         """
         logger.info("Verifying password")
-        result = cls.pwd_context.verify(plain_password, hashed_password)
+        result = cls.get_pwd_context().verify(plain_password, hashed_password)
         logger.info(f"Password verification returned: {result}")
         return result
 
@@ -57,15 +82,14 @@ class Auth:
         Returns:
             dict: New claims with expiration time
         """
+        settings = get_settings()
         logger.info(f"Creating jwt token for data: {data}")
         to_encode = data.copy()
         to_encode.update(
             {"exp": datetime.utcnow() + timedelta(minutes=settings.JWT_EXPIRE_MINUTES)}
         )
         logger.info(f"Update data with exp: {to_encode}")
-        return jwt.encode(
-            to_encode, key=settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM
-        )
+        return tokens.encode(to_encode)
 
     @classmethod
     def get_user(cls, username: str) -> bool | User:
@@ -78,7 +102,7 @@ class Auth:
             bool | User: User model if user exists else False
         """
         logger.info(f"Getting user: {username}")
-        with Session(engine) as session:
+        with Session(get_engine()) as session:
             user = session.query(User).filter(User.username == username).first()
 
         if not user:
@@ -129,16 +153,14 @@ class Auth:
         )
         logger.info(f"Decoding token: {token}")
         try:
-            payload = jwt.decode(
-                token, key=settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM]
-            )
+            payload = tokens.decode(token)
             username: str = payload.get("sub")
             logger.info(f"Data from token: {payload}")
 
             if username is None:
                 logger.info("Username not found in token")
                 raise credentials_exception
-        except JWTError:
+        except tokens.InvalidTokenError:
             raise credentials_exception
 
         user = cls.get_user(username)
@@ -150,6 +172,9 @@ class Auth:
     def get_password_reset_token(cls, user_id: int, token_expiry_in_hours: int) -> str:
         """Returns a password reset token
 
+        Only the newest PASSWORD_RESET_MAX_TOKENS_PER_USER tokens of a user
+        stay valid, older ones are deleted.
+
         Args:
             user_id (int): Valid user id for foreign key
             token_expiry (str): Password reset token expiry in hours
@@ -157,11 +182,33 @@ class Auth:
         Returns:
             str: Random token
         """
-        with Session(engine) as db:
+        max_tokens = get_settings().PASSWORD_RESET_MAX_TOKENS_PER_USER
+        with Session(get_engine()) as db:
             logger.info("Generating password reset token")
+            stale_tokens = (
+                db.query(ResetPassword.token_hash)
+                .filter(ResetPassword.user_id == user_id)
+                .order_by(ResetPassword.token_expiry.desc())
+                .offset(max_tokens - 1)
+                .subquery()
+            )
+            deleted = (
+                db.query(ResetPassword)
+                .filter(
+                    ResetPassword.token_hash.in_(db.query(stale_tokens.c.token_hash))
+                )
+                .delete(synchronize_session=False)
+            )
+            if deleted:
+                logger.info(
+                    f"Deleted {deleted} outstanding tokens for user id: {user_id}"
+                )
+
             token = secrets.token_urlsafe(64)
             token_expiry = datetime.today() + timedelta(hours=token_expiry_in_hours)
-            obj = ResetPassword(token=token, user_id=user_id, token_expiry=token_expiry)
+            obj = ResetPassword(
+                token_hash=hash_token(token), user_id=user_id, token_expiry=token_expiry
+            )
             db.add(obj)
             db.commit()
         return token
@@ -180,9 +227,9 @@ class Auth:
         Returns:
             bool: True if password reset was successfull
         """
-        with Session(engine) as db:
+        with Session(get_engine()) as db:
             logger.info("Verifying reset token")
-            token_available = db.query(ResetPassword).get(token)
+            token_available = db.query(ResetPassword).get(hash_token(token))
             if not token_available:
                 logger.info("Invalid password reset token")
                 raise HTTPException(
@@ -198,11 +245,6 @@ class Auth:
             db.commit()
             logger.info(f"Deleted all existing tokens for user id: {user_id}")
 
-            # Convert a string from database to datetime object
-            # token_expiry = datetime.strptime(
-            #     token_available.token_expiry, "%Y-%m-%d %H:%M:%S.%f"
-            # )
-
             if token_available.token_expiry < datetime.today():
                 logger.info(
                     f"Password reset token expired. Token Expiry: {token_available.token_expiry} < Today: {datetime.today()}"
@@ -214,6 +256,24 @@ class Auth:
 
             user = db.query(User).get(user_id)
             user.password = cls.create_hash_password(new_password)
+            Sessions.revoke_all(db, user_id)
             db.commit()
             logger.info(f"Password reset for user: {user} successful")
             return True
+
+    @classmethod
+    def purge_expired_reset_tokens(cls) -> int:
+        """Delete expired password reset tokens in batches of PURGE_BATCH_SIZE
+
+        Returns:
+            int: Number of deleted rows
+        """
+        with Session(get_engine()) as db:
+            deleted = delete_in_batches(
+                db,
+                ResetPassword,
+                ResetPassword.token_expiry < datetime.today(),
+                get_settings().PURGE_BATCH_SIZE,
+            )
+        logger.info(f"Purged {deleted} expired password reset tokens")
+        return deleted
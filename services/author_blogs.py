@@ -0,0 +1,129 @@
+import base64
+import binascii
+import time
+from datetime import datetime
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from models.blog import Blog
+from models.user import User
+from schemas.blog import BlogSummaryOut
+from services.cache import TTLCache
+from settings import get_settings
+
+MAX_PAGE_SIZE = 20
+
+_first_pages: TTLCache | None = None
+
+
+def encode_cursor(blog: BlogSummaryOut) -> str:
+    value = f"{blog.created_at.isoformat()}|{blog.id}"
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Return the created_at and id encoded in a cursor
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        created_at, blog_id = base64.urlsafe_b64decode(cursor).decode().split("|")
+        return datetime.fromisoformat(created_at), int(blog_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+class AuthorBlogs:
+    """Blogs of one author, newest first, paged by (created_at, id)
+
+    Only columns of the covering index ix_blogs_user_id_created_at_id are
+    selected. The first page of each author is cached with the author's
+    blogs_version, which every write bumps in the database. A page cached by
+    any worker is only served while the version read with the author's id
+    still matches, so writes are seen by every worker on their next read.
+    """
+
+    @classmethod
+    def get_cache(cls) -> TTLCache:
+        global _first_pages
+        if _first_pages is None:
+            _first_pages = TTLCache(
+                "author_first_pages", get_settings().AUTHOR_BLOGS_CACHE_SIZE
+            )
+        return _first_pages
+
+    @classmethod
+    def query(
+        cls,
+        db: Session,
+        user_id: int,
+        limit: int,
+        after: tuple[datetime, int] | None = None,
+    ) -> list[BlogSummaryOut]:
+        query = db.query(
+            Blog.id, Blog.title, Blog.summary, Blog.views, Blog.created_at
+        ).filter(Blog.user_id == user_id, Blog.deleted_at.is_(None))
+        if after is not None:
+            query = query.filter(sa.tuple_(Blog.created_at, Blog.id) < after)
+        rows = query.order_by(Blog.created_at.desc(), Blog.id.desc()).limit(limit)
+        return [BlogSummaryOut.from_orm(row) for row in rows]
+
+    @classmethod
+    def page(
+        cls, db: Session, username: str, limit: int, cursor: str | None = None
+    ) -> tuple[list[BlogSummaryOut], str | None] | None:
+        """Return a page of an author's blogs and the cursor of the next one
+
+        Args:
+            db (Session): Session to read with
+            username (str): Username of the author
+            limit (int): Number of blogs, at most MAX_PAGE_SIZE
+            cursor (str | None, optional): Cursor returned with the previous page
+
+        Raises:
+            ValueError: If the cursor is malformed
+
+        Returns:
+            tuple[list[BlogSummaryOut], str | None] | None: Blogs and next
+                cursor, None if the author does not exist
+        """
+        after = decode_cursor(cursor) if cursor else None
+        author = (
+            db.query(User.id, User.blogs_version)
+            .filter(User.username == username)
+            .one_or_none()
+        )
+        if author is None:
+            return None
+        user_id, version = author
+        # One extra row tells whether there is a next page
+        if after:
+            blogs = cls.query(db, user_id, limit + 1, after)
+        else:
+            cache = cls.get_cache()
+            cached = cache.get(user_id)
+            if cached is not None and cached[0] == version:
+                blogs = cached[1]
+            else:
+                blogs = cls.query(db, user_id, MAX_PAGE_SIZE + 1)
+                cache.set(
+                    user_id,
+                    (version, blogs),
+                    time.time() + get_settings().AUTHOR_BLOGS_CACHE_SECONDS,
+                )
+        next_cursor = encode_cursor(blogs[limit - 1]) if len(blogs) > limit else None
+        return blogs[:limit], next_cursor
+
+    @classmethod
+    def invalidate(cls, db: Session, user_id: int) -> None:
+        """Bump an author's blogs_version in the transaction of their write
+
+        Args:
+            db (Session): Session of the write, committed by the caller
+            user_id (int): Id of the author
+        """
+        db.query(User).filter(User.id == user_id).update(
+            {User.blogs_version: User.blogs_version + 1}, synchronize_session=False
+        )
@@ -0,0 +1,79 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+_caches: dict[str, "TTLCache"] = {}
+
+
+class TTLCache:
+    """Thread safe LRU cache whose entries expire at a given unix time"""
+
+    def __init__(self, name: str, maxsize: int):
+        self.name = name
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        _caches[name] = self
+
+    def get(self, key: Hashable) -> Any | None:
+        """Return the cached value or None if missing or expired
+
+        Args:
+            key (Hashable): Cache key
+
+        Returns:
+            Any | None: Cached value
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= time.time():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, expires_at: float) -> None:
+        """Store a value until expires_at, evicting the least recently used
+
+        Args:
+            key (Hashable): Cache key
+            value (Any): Value to store
+            expires_at (float): Unix time after which the value is dropped
+        """
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        """Return size and hit rate of the cache"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+def get_caches() -> dict[str, TTLCache]:
+    """Return every cache created in this process by name"""
+    return _caches
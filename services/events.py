@@ -0,0 +1,165 @@
+import asyncio
+import json
+import threading
+from abc import ABC, abstractmethod
+
+from loguru import logger
+
+from settings import get_settings
+
+
+def format_event(event: str, data: dict) -> bytes:
+    """Encode an event in the text/event-stream format
+
+    Args:
+        event (str): Event name
+        data (dict): JSON serializable payload
+
+    Returns:
+        bytes: Encoded event, shared by every subscriber
+    """
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n".encode()
+
+
+class Subscription:
+    """Bounded queue of encoded events for one connected client
+
+    A client that falls more than maxsize events behind is dropped instead
+    of buffering without limit.
+    """
+
+    def __init__(self, topic: str, maxsize: int):
+        self.topic = topic
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue[bytes | None] = asyncio.Queue(maxsize)
+        self.dropped = False
+
+    def offer(self, message: bytes) -> None:
+        """Queue a message, dropping the subscription when its queue is full
+
+        Must run on the subscription's event loop.
+        """
+        if self.dropped:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.dropped = True
+            # Free the backlog and wake the reader so it closes the stream
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+            logger.info(f"Dropped slow subscriber of {self.topic}")
+
+
+class Hub:
+    """Delivers published events to the subscriptions of this process"""
+
+    def __init__(self):
+        self._topics: dict[str, set[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, topic: str) -> Subscription:
+        subscription = Subscription(topic, get_settings().SSE_QUEUE_SIZE)
+        with self._lock:
+            self._topics.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._topics.get(subscription.topic)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._topics[subscription.topic]
+
+    def has_subscribers(self, topic: str) -> bool:
+        with self._lock:
+            return topic in self._topics
+
+    def dispatch(self, topic: str, message: bytes) -> None:
+        """Hand a message to every local subscriber of a topic
+
+        Safe to call from any thread, including the threadpool running
+        sync endpoints.
+        """
+        with self._lock:
+            subscriptions = list(self._topics.get(topic, ()))
+        for subscription in subscriptions:
+            subscription.loop.call_soon_threadsafe(subscription.offer, message)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "topics": len(self._topics),
+                "subscriptions": sum(len(s) for s in self._topics.values()),
+            }
+
+
+class Backend(ABC):
+    """Transport between publishers and the hub
+
+    The local backend only reaches subscribers of the same process. A
+    backend for several nodes publishes to a broker such as Redis and calls
+    hub.dispatch for every message it receives from it.
+    """
+
+    def __init__(self, hub: Hub):
+        self.hub = hub
+
+    @abstractmethod
+    def publish(self, topic: str, message: bytes) -> None:
+        ...
+
+    def has_subscribers(self, topic: str) -> bool:
+        """Tell whether a topic may have subscribers on any node
+
+        Backends that can't tell return True, so events are never lost.
+        """
+        return True
+
+
+class LocalBackend(Backend):
+    def publish(self, topic: str, message: bytes) -> None:
+        self.hub.dispatch(topic, message)
+
+    def has_subscribers(self, topic: str) -> bool:
+        return self.hub.has_subscribers(topic)
+
+
+hub = Hub()
+_backend: Backend = LocalBackend(hub)
+
+
+def set_backend(backend: Backend) -> None:
+    """Replace the backend, e.g. with one shared by several nodes"""
+    global _backend
+    _backend = backend
+
+
+def blog_topic(blog_id: int) -> str:
+    return f"blogs:{blog_id}"
+
+
+def has_subscribers(topic: str) -> bool:
+    """Tell whether publishing to a topic can reach anyone
+
+    Lets publishers skip building payloads, such as counts that need a
+    query, when nobody listens.
+    """
+    return _backend.has_subscribers(topic)
+
+
+def publish(topic: str, event: str, data: dict) -> None:
+    """Publish an event to every subscriber of a topic
+
+    Args:
+        topic (str): Topic to publish to
+        event (str): Event name
+        data (dict): JSON serializable payload
+    """
+    try:
+        _backend.publish(topic, format_event(event, data))
+    except Exception:
+        # Live updates are best effort and must not fail the write
+        logger.exception(f"Failed to publish {event} to {topic}")
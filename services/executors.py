@@ -0,0 +1,77 @@
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable
+
+from loguru import logger
+
+from settings import get_settings
+
+_process_pool: ProcessPoolExecutor | None = None
+_pending = 0
+_lock = threading.Lock()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Return the process pool for CPU bound work, creating it on first use
+
+    The pool is created lazily inside the worker process that serves
+    requests, never in a parent that forks afterwards.
+    """
+    global _process_pool
+    with _lock:
+        if _process_pool is None:
+            max_workers = get_settings().PROCESS_POOL_WORKERS or None
+            _process_pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info(
+                f"Started process pool with {_process_pool._max_workers} workers"
+            )
+    return _process_pool
+
+
+def _done(future: Future) -> None:
+    global _pending
+    with _lock:
+        _pending -= 1
+
+
+def submit(func: Callable, *args) -> Future:
+    """Run func(*args) in the process pool
+
+    Args:
+        func (Callable): Module level function to run
+        *args: Picklable arguments
+
+    Returns:
+        Future: Future of the result
+    """
+    global _pending
+    pool = get_process_pool()
+    with _lock:
+        _pending += 1
+    future = pool.submit(func, *args)
+    future.add_done_callback(_done)
+    return future
+
+
+def shutdown() -> None:
+    """Wait for queued work and stop the process pool"""
+    global _process_pool
+    with _lock:
+        pool, _process_pool = _process_pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=False)
+
+
+def stats() -> dict:
+    """Return size and queue depth of the process pool"""
+    return {
+        "process_pool": {
+            "started": _process_pool is not None,
+            "workers": _process_pool._max_workers if _process_pool else 0,
+            "pending": _pending,
+        }
+    }
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from db import get_engine
+from models.idempotency import IdempotencyKey
+from settings import get_settings
+from utils import delete_in_batches, insert_ignore
+
+
+class IdempotencyKeys:
+    """Responses of write requests stored under their Idempotency-Key"""
+
+    @classmethod
+    def claim(cls, key_hash: str, request_hash: str) -> IdempotencyKey | None:
+        """Reserve a key for a request about to run
+
+        Args:
+            key_hash (str): Hash identifying the key
+            request_hash (str): Hash of the request body
+
+        Returns:
+            IdempotencyKey | None: None if the key was reserved, otherwise
+                the row of the request that reserved it first
+        """
+        now = datetime.utcnow()
+        values = {
+            "key_hash": key_hash,
+            "request_hash": request_hash,
+            "created_at": now,
+            "expires_at": now
+            + timedelta(seconds=get_settings().IDEMPOTENCY_KEY_TTL_SECONDS),
+        }
+        with Session(get_engine(), expire_on_commit=False) as db:
+            if insert_ignore(db, IdempotencyKey, values):
+                db.commit()
+                return None
+            row = db.query(IdempotencyKey).get(key_hash)
+            if row is None or row.expires_at < now:
+                # Released or expired but not purged yet, so the key is free
+                if row is not None:
+                    db.delete(row)
+                    db.flush()
+                if insert_ignore(db, IdempotencyKey, values):
+                    db.commit()
+                    return None
+                row = db.query(IdempotencyKey).get(key_hash)
+            db.commit()
+            return row
+
+    @classmethod
+    def complete(
+        cls, key_hash: str, status_code: int, media_type: str | None, body: bytes
+    ) -> None:
+        """Store the response of the request that reserved a key"""
+        with Session(get_engine()) as db:
+            db.query(IdempotencyKey).filter(IdempotencyKey.key_hash == key_hash).update(
+                {
+                    IdempotencyKey.status_code: status_code,
+                    IdempotencyKey.media_type: media_type,
+                    IdempotencyKey.body: body,
+                }
+            )
+            db.commit()
+
+    @classmethod
+    def release(cls, key_hash: str) -> None:
+        """Forget a key whose request failed, so a retry runs it again"""
+        with Session(get_engine()) as db:
+            db.query(IdempotencyKey).filter(
+                IdempotencyKey.key_hash == key_hash
+            ).delete()
+            db.commit()
+
+    @classmethod
+    def purge_expired(cls) -> int:
+        """Delete expired keys in batches of PURGE_BATCH_SIZE
+
+        Returns:
+            int: Number of deleted rows
+        """
+        with Session(get_engine()) as db:
+            deleted = delete_in_batches(
+                db,
+                IdempotencyKey,
+                IdempotencyKey.expires_at < datetime.utcnow(),
+                get_settings().PURGE_BATCH_SIZE,
+            )
+        logger.info(f"Purged {deleted} expired idempotency keys")
+        return deleted
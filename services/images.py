@@ -0,0 +1,46 @@
+import hashlib
+import io
+
+THUMBNAIL_FORMAT = "WEBP"
+THUMBNAIL_EXTENSION = "webp"
+
+
+class InvalidImageError(Exception):
+    """Raised when an upload can not be decoded as an image"""
+
+
+def make_thumbnails(data: bytes, sizes: list[int]) -> dict[int, tuple[str, bytes]]:
+    """Resize an image into square thumbnails
+
+    Runs in the process pool, so it only takes and returns picklable values.
+    Pillow is imported here rather than at module level to keep it off the
+    app's startup path.
+
+    Args:
+        data (bytes): Encoded uploaded image
+        sizes (list[int]): Edge lengths of the thumbnails in pixels
+
+    Raises:
+        InvalidImageError: If the file is not an image Pillow can read
+
+    Returns:
+        dict[int, tuple[str, bytes]]: Content hashed file name and encoded
+            thumbnail for each size
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image = ImageOps.exif_transpose(image).convert("RGB")
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        raise InvalidImageError(str(e))
+
+    thumbnails = {}
+    for size in sizes:
+        thumbnail = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        thumbnail.save(buffer, THUMBNAIL_FORMAT, quality=85, method=4)
+        data = buffer.getvalue()
+        digest = hashlib.sha256(data).hexdigest()
+        thumbnails[size] = (f"{digest}_{size}.{THUMBNAIL_EXTENSION}", data)
+    return thumbnails
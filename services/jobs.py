@@ -0,0 +1,49 @@
+import asyncio
+from typing import Callable
+
+from fastapi.concurrency import run_in_threadpool
+from loguru import logger
+
+_jobs: dict[str, tuple[float, Callable[[], None]]] = {}
+_tasks: list[asyncio.Task] = []
+
+
+def schedule(name: str, interval_seconds: float, func: Callable[[], None]) -> None:
+    """Register a blocking function to run every interval_seconds
+
+    Jobs run in the threadpool of every worker once start() is called.
+    An interval of 0 or less disables the job.
+
+    Args:
+        name (str): Name used in logs
+        interval_seconds (float): Seconds between two runs
+        func (Callable[[], None]): Function to run
+    """
+    if interval_seconds <= 0:
+        logger.info(f"Job {name} disabled")
+        return
+    _jobs[name] = (interval_seconds, func)
+
+
+async def _run(name: str, interval_seconds: float, func: Callable[[], None]) -> None:
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await run_in_threadpool(func)
+        except Exception:
+            logger.exception(f"Job {name} failed")
+
+
+def start() -> None:
+    """Start every scheduled job on the running event loop"""
+    for name, (interval_seconds, func) in _jobs.items():
+        logger.info(f"Starting job {name} every {interval_seconds}s")
+        _tasks.append(asyncio.create_task(_run(name, interval_seconds, func)))
+
+
+async def stop() -> None:
+    """Cancel every running job"""
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
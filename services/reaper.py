@@ -0,0 +1,46 @@
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from db import get_engine
+from models.blog import Blog
+from models.comment import Comment
+from models.like import Like
+from models.tag import BlogTag
+from settings import get_settings
+from utils import delete_in_batches
+
+
+class BlogReaper:
+    """Removes soft deleted blogs together with their comments, likes and tags"""
+
+    @classmethod
+    def reap(cls) -> int:
+        """Delete dependent rows of soft deleted blogs in bounded batches
+
+        Each batch commits on its own, so no single transaction holds locks
+        on thousands of rows the way a cascading delete would.
+
+        Returns:
+            int: Number of blogs removed
+        """
+        batch_size = get_settings().PURGE_BATCH_SIZE
+        with Session(get_engine()) as db:
+            blog_ids = [
+                blog_id
+                for blog_id, in db.query(Blog.id)
+                .filter(Blog.deleted_at.isnot(None))
+                .order_by(Blog.deleted_at)
+                .limit(batch_size)
+            ]
+            for blog_id in blog_ids:
+                comments = delete_in_batches(
+                    db, Comment, Comment.post_id == blog_id, batch_size
+                )
+                likes = delete_in_batches(db, Like, Like.post_id == blog_id, batch_size)
+                db.query(BlogTag).filter(BlogTag.blog_id == blog_id).delete()
+                db.query(Blog).filter(Blog.id == blog_id).delete()
+                db.commit()
+                logger.info(
+                    f"Reaped blog {blog_id} with {comments} comments and {likes} likes"
+                )
+        return len(blog_ids)
@@ -0,0 +1,170 @@
+import secrets
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException, status
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from db import get_engine
+from models.session import UserSession
+from models.user import User
+from settings import get_settings
+from utils import delete_in_batches, hash_token
+
+
+class Sessions:
+    """Refresh tokens stored as hashed rows of the user_sessions table"""
+
+    @classmethod
+    def create(cls, db: Session, user_id: int) -> str:
+        """Add a new session for a user, committed by the caller
+
+        Args:
+            db (Session): Session to add the row to
+            user_id (int): Owner of the session
+
+        Returns:
+            str: Refresh token
+        """
+        token = secrets.token_urlsafe(48)
+        expires_at = datetime.utcnow() + timedelta(
+            days=get_settings().REFRESH_TOKEN_EXPIRE_DAYS
+        )
+        db.add(
+            UserSession(
+                token_hash=hash_token(token), user_id=user_id, expires_at=expires_at
+            )
+        )
+        return token
+
+    @classmethod
+    def start(cls, user: User) -> str:
+        """Start a session for a user who just logged in
+
+        Args:
+            user (User): Authenticated user
+
+        Returns:
+            str: Refresh token
+        """
+        with Session(get_engine()) as db:
+            token = cls.create(db, user.id)
+            db.commit()
+        logger.info(f"Started session for user: {user}")
+        return token
+
+    @classmethod
+    def rotate(cls, token: str) -> tuple[User, str]:
+        """Exchange a refresh token for a new one
+
+        Presenting a token that was already rotated or revoked means it
+        leaked, so every session of its user is revoked.
+
+        Args:
+            token (str): Current refresh token
+
+        Raises:
+            HTTPException: If the token is unknown, expired or revoked
+
+        Returns:
+            tuple[User, str]: Owner of the session and the new refresh token
+        """
+        invalid_token = HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+        now = datetime.utcnow()
+        with Session(get_engine(), expire_on_commit=False) as db:
+            row = (
+                db.query(UserSession, User)
+                .join(User, User.id == UserSession.user_id)
+                .filter(UserSession.token_hash == hash_token(token))
+                .first()
+            )
+            if not row:
+                logger.info("Refresh token not found")
+                raise invalid_token
+
+            user_session, user = row
+            if user_session.revoked_at is not None:
+                logger.warning(f"Reused refresh token for user: {user}. Revoking all")
+                cls.revoke_all(db, user.id)
+                db.commit()
+                raise invalid_token
+            if user_session.expires_at < now:
+                logger.info(f"Refresh token expired for user: {user}")
+                raise invalid_token
+
+            # Revoke only if still active, so of two concurrent refreshes
+            # with the same token exactly one wins and the other is reuse
+            revoked = (
+                db.query(UserSession)
+                .filter(
+                    UserSession.id == user_session.id,
+                    UserSession.revoked_at.is_(None),
+                )
+                .update({UserSession.revoked_at: now}, synchronize_session=False)
+            )
+            if not revoked:
+                logger.warning(f"Reused refresh token for user: {user}. Revoking all")
+                cls.revoke_all(db, user.id)
+                db.commit()
+                raise invalid_token
+            new_token = cls.create(db, user.id)
+            db.commit()
+        logger.info(f"Rotated refresh token for user: {user}")
+        return user, new_token
+
+    @classmethod
+    def revoke(cls, token: str) -> None:
+        """Revoke a refresh token, used on logout
+
+        Args:
+            token (str): Refresh token to revoke
+        """
+        with Session(get_engine()) as db:
+            db.query(UserSession).filter(
+                UserSession.token_hash == hash_token(token),
+                UserSession.revoked_at.is_(None),
+            ).update({UserSession.revoked_at: datetime.utcnow()})
+            db.commit()
+
+    @classmethod
+    def revoke_all(cls, db: Session, user_id: int) -> int:
+        """Revoke every active session of a user, committed by the caller
+
+        Used when a refresh token is reused and when the password changes,
+        so tokens issued before either can no longer be rotated.
+
+        Args:
+            db (Session): Session to write with
+            user_id (int): Owner of the sessions
+
+        Returns:
+            int: Number of revoked sessions
+        """
+        return (
+            db.query(UserSession)
+            .filter(UserSession.user_id == user_id, UserSession.revoked_at.is_(None))
+            .update(
+                {UserSession.revoked_at: datetime.utcnow()}, synchronize_session=False
+            )
+        )
+
+    @classmethod
+    def purge_expired(cls) -> int:
+        """Delete expired sessions in batches of PURGE_BATCH_SIZE
+
+        Returns:
+            int: Number of deleted rows
+        """
+        with Session(get_engine()) as db:
+            deleted = delete_in_batches(
+                db,
+                UserSession,
+                UserSession.expires_at < datetime.utcnow(),
+                get_settings().PURGE_BATCH_SIZE,
+            )
+        logger.info(f"Purged {deleted} expired sessions")
+        return deleted
@@ -0,0 +1,90 @@
+import os
+import secrets
+from abc import ABC, abstractmethod
+
+from settings import get_settings
+
+
+class Storage(ABC):
+    """Interface for storing immutable, content addressed files"""
+
+    @abstractmethod
+    def save(self, name: str, data: bytes) -> None:
+        ...
+
+    @abstractmethod
+    def exists(self, name: str) -> bool:
+        ...
+
+    @abstractmethod
+    def url(self, name: str) -> str:
+        ...
+
+
+class LocalStorage(Storage):
+    """Files in a directory on the local filesystem, served by routers.media"""
+
+    def __init__(self, root: str, base_url: str):
+        self.root = os.path.abspath(root)
+        self.base_url = base_url.rstrip("/")
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, name: str) -> str:
+        """Return the absolute path of a stored file
+
+        Args:
+            name (str): Name of the file
+
+        Raises:
+            ValueError: If the name would leave the storage directory
+
+        Returns:
+            str: Absolute path
+        """
+        if not name or os.path.basename(name) != name or name.startswith("."):
+            raise ValueError(f"Invalid file name: {name}")
+        return os.path.join(self.root, name)
+
+    def save(self, name: str, data: bytes) -> None:
+        """Write a file atomically, so readers never see partial content
+
+        Args:
+            name (str): Name of the file
+            data (bytes): Content of the file
+        """
+        path = self.path(name)
+        if os.path.exists(path):
+            return
+        tmp_path = f"{path}.{secrets.token_hex(8)}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def exists(self, name: str) -> bool:
+        return os.path.isfile(self.path(name))
+
+    def url(self, name: str) -> str:
+        return f"{self.base_url}/{name}"
+
+
+_storage: Storage | None = None
+
+
+def get_storage() -> Storage:
+    """Return the configured storage backend"""
+    global _storage
+    if _storage is None:
+        settings = get_settings()
+        _storage = LocalStorage(settings.MEDIA_ROOT, settings.MEDIA_URL)
+    return _storage
+
+
+def set_storage(storage: Storage | None) -> None:
+    """Replace the storage backend, e.g. with one for a remote object store
+
+    Args:
+        storage (Storage | None): New backend, None to build it from the
+            settings on next use
+    """
+    global _storage
+    _storage = storage
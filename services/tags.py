@@ -0,0 +1,67 @@
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+
+from models.tag import BlogTag, Tag
+from utils import insert_ignore
+
+
+class Tags:
+    """Tags of blogs and the per tag blog counts served as facets"""
+
+    @classmethod
+    def set_blog_tags(
+        cls, db: Session, blog_id: int, names: list[str], new: bool = False
+    ) -> None:
+        """Replace the tags of a blog and update the counts, committed by the caller
+
+        Args:
+            db (Session): Session to write with
+            blog_id (int): Id of the blog
+            names (list[str]): Normalized tag names
+            new (bool, optional): The blog was just created and has no tags yet
+        """
+        current = {}
+        if not new:
+            current = dict(
+                db.query(Tag.name, Tag.id)
+                .join(BlogTag, BlogTag.tag_id == Tag.id)
+                .filter(BlogTag.blog_id == blog_id)
+            )
+        added = [name for name in names if name not in current]
+        removed = [tag_id for name, tag_id in current.items() if name not in names]
+
+        if added:
+            insert_ignore(db, Tag, [{"name": name} for name in added])
+            added_ids = [
+                tag_id for tag_id, in db.query(Tag.id).filter(Tag.name.in_(added))
+            ]
+            db.execute(
+                sa.insert(BlogTag),
+                [{"blog_id": blog_id, "tag_id": tag_id} for tag_id in added_ids],
+            )
+            cls._add_to_counts(db, Tag.id.in_(added_ids), 1)
+        if removed:
+            db.query(BlogTag).filter(
+                BlogTag.blog_id == blog_id, BlogTag.tag_id.in_(removed)
+            ).delete(synchronize_session=False)
+            cls._add_to_counts(db, Tag.id.in_(removed), -1)
+
+    @classmethod
+    def uncount_blog(cls, db: Session, blog_id: int) -> None:
+        """Remove a deleted blog from the counts of its tags
+
+        The blog_tags rows stay until the blog is reaped.
+
+        Args:
+            db (Session): Session to write with, committed by the caller
+            blog_id (int): Id of the deleted blog
+        """
+        tag_ids = db.query(BlogTag.tag_id).filter(BlogTag.blog_id == blog_id)
+        cls._add_to_counts(db, Tag.id.in_(tag_ids.scalar_subquery()), -1)
+
+    @classmethod
+    def _add_to_counts(cls, db: Session, condition: ColumnElement, amount: int) -> None:
+        db.query(Tag).filter(condition).update(
+            {Tag.blog_count: Tag.blog_count + amount}, synchronize_session=False
+        )
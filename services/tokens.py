@@ -0,0 +1,139 @@
+import hashlib
+
+from loguru import logger
+
+from services.cache import TTLCache
+from settings import Settings, get_settings
+
+
+class InvalidTokenError(Exception):
+    """Raised when a token can not be decoded or verified"""
+
+
+class JoseBackend:
+    def __init__(self):
+        from jose import JWTError, jwt
+
+        self.jwt = jwt
+        self.errors = (JWTError,)
+
+    def encode(self, claims: dict, key: str, algorithm: str, headers: dict) -> str:
+        return self.jwt.encode(claims, key=key, algorithm=algorithm, headers=headers)
+
+    def decode(self, token: str, key: str, algorithms: list[str]) -> dict:
+        try:
+            return self.jwt.decode(token, key=key, algorithms=algorithms)
+        except self.errors as e:
+            raise InvalidTokenError(str(e))
+
+    def get_unverified_header(self, token: str) -> dict:
+        try:
+            return self.jwt.get_unverified_header(token)
+        except self.errors as e:
+            raise InvalidTokenError(str(e))
+
+
+class PyJWTBackend(JoseBackend):
+    """Backend using PyJWT, which verifies HMAC tokens with less overhead"""
+
+    def __init__(self):
+        try:
+            import jwt
+        except ImportError:
+            raise RuntimeError("JWT_BACKEND=pyjwt requires the PyJWT package")
+
+        self.jwt = jwt
+        self.errors = (jwt.PyJWTError,)
+
+    def encode(self, claims: dict, key: str, algorithm: str, headers: dict) -> str:
+        return self.jwt.encode(claims, key, algorithm=algorithm, headers=headers)
+
+    def decode(self, token: str, key: str, algorithms: list[str]) -> dict:
+        try:
+            return self.jwt.decode(token, key, algorithms=algorithms)
+        except self.errors as e:
+            raise InvalidTokenError(str(e))
+
+
+BACKENDS = {"jose": JoseBackend, "pyjwt": PyJWTBackend}
+
+_backend: JoseBackend | None = None
+_claims_cache: TTLCache | None = None
+
+
+def configure(settings: Settings) -> None:
+    """Select the JWT backend and size the verified claims cache
+
+    Args:
+        settings (Settings): Settings to read the backend and cache size from
+    """
+    global _backend, _claims_cache
+    if settings.JWT_BACKEND not in BACKENDS:
+        raise ValueError(f"Unknown JWT_BACKEND: {settings.JWT_BACKEND}")
+    _backend = BACKENDS[settings.JWT_BACKEND]()
+    _claims_cache = TTLCache("jwt_claims", settings.JWT_CACHE_SIZE)
+    logger.info(f"Using {settings.JWT_BACKEND} JWT backend")
+
+
+def get_backend() -> JoseBackend:
+    if _backend is None:
+        configure(get_settings())
+    return _backend
+
+
+def encode(claims: dict) -> str:
+    """Sign claims with the active key
+
+    Tokens signed with a key from JWT_SECRET_KEYS carry its id in the `kid`
+    header so they stay verifiable after the active key changes.
+
+    Args:
+        claims (dict): Claims to encode
+
+    Returns:
+        str: Signed token
+    """
+    settings = get_settings()
+    kid = settings.JWT_ACTIVE_KEY_ID
+    if kid:
+        key, headers = settings.JWT_SECRET_KEYS[kid], {"kid": kid}
+    else:
+        key, headers = settings.JWT_SECRET_KEY, {}
+    return get_backend().encode(claims, key, settings.JWT_ALGORITHM, headers)
+
+
+def decode(token: str) -> dict:
+    """Verify a token and return its claims
+
+    Verified claims are cached by token digest until the token expires, so
+    repeated requests with the same token skip signature verification.
+
+    Args:
+        token (str): Token to verify
+
+    Raises:
+        InvalidTokenError: If the token is malformed, expired or signed
+            with an unknown key
+
+    Returns:
+        dict: Token claims
+    """
+    backend = get_backend()
+    digest = hashlib.sha256(token.encode()).digest()
+    claims = _claims_cache.get(digest)
+    if claims is not None:
+        return claims
+
+    settings = get_settings()
+    kid = backend.get_unverified_header(token).get("kid")
+    if kid is None:
+        key = settings.JWT_SECRET_KEY
+    elif kid in settings.JWT_SECRET_KEYS:
+        key = settings.JWT_SECRET_KEYS[kid]
+    else:
+        raise InvalidTokenError(f"Unknown key id: {kid}")
+
+    claims = backend.decode(token, key, [settings.JWT_ALGORITHM])
+    if "exp" in claims:
+        _claims_cache.set(digest, claims, claims["exp"])
+    return claims
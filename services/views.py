@@ -0,0 +1,101 @@
+import itertools
+import threading
+from collections import Counter
+
+import sqlalchemy as sa
+from loguru import logger
+
+from db import get_engine
+from models.blog import Blog
+from settings import get_settings
+
+
+class ShardedCounter:
+    """In memory counters split across shards to limit lock contention
+
+    Threads are given shards round robin the first time they count, so
+    concurrent reads of the same blog rarely wait on one another. Thread
+    idents are not used, they are aligned addresses that share a remainder.
+    """
+
+    def __init__(self, shards: int):
+        self._shards = [(threading.Lock(), Counter()) for _ in range(max(shards, 1))]
+        self._next_shard = itertools.count()
+        self._local = threading.local()
+
+    def shard_index(self) -> int:
+        """Return the shard of the calling thread"""
+        index = getattr(self._local, "index", None)
+        if index is None:
+            index = self._local.index = next(self._next_shard) % len(self._shards)
+        return index
+
+    def increment(self, key: int) -> None:
+        lock, counts = self._shards[self.shard_index()]
+        with lock:
+            counts[key] += 1
+
+    def drain(self) -> Counter:
+        """Return the counts of every shard and reset them to zero"""
+        total = Counter()
+        for lock, counts in self._shards:
+            with lock:
+                total.update(counts)
+                counts.clear()
+        return total
+
+    def restore(self, counts: Counter) -> None:
+        """Add back counts that could not be flushed"""
+        lock, shard = self._shards[0]
+        with lock:
+            shard.update(counts)
+
+
+_counter: ShardedCounter | None = None
+_counter_lock = threading.Lock()
+
+
+def get_counter() -> ShardedCounter:
+    global _counter
+    with _counter_lock:
+        if _counter is None:
+            _counter = ShardedCounter(get_settings().VIEW_COUNTER_SHARDS)
+    return _counter
+
+
+def record(blog_id: int) -> None:
+    """Count a view of a blog, written to the database on the next flush
+
+    Args:
+        blog_id (int): Id of the viewed blog
+    """
+    get_counter().increment(blog_id)
+
+
+def flush() -> int:
+    """Add the buffered view counts to the blogs table in one batch
+
+    Counts are restored when the update fails, so they are retried on the
+    next flush instead of being lost.
+
+    Returns:
+        int: Number of blogs updated
+    """
+    counter = get_counter()
+    counts = counter.drain()
+    if not counts:
+        return 0
+    statement = (
+        sa.update(Blog.__table__)
+        .where(Blog.__table__.c.id == sa.bindparam("blog_id"))
+        .values(views=Blog.__table__.c.views + sa.bindparam("n"))
+    )
+    params = [{"blog_id": blog_id, "n": n} for blog_id, n in sorted(counts.items())]
+    try:
+        with get_engine().begin() as connection:
+            connection.execute(statement, params)
+    except Exception:
+        counter.restore(counts)
+        raise
+    logger.info(f"Flushed {sum(counts.values())} views of {len(counts)} blogs")
+    return len(counts)
@@ -5,14 +5,92 @@ class Settings(pydantic.BaseSettings):
     DEBUG: bool
     API_ENTRYPOINT: str
     DATABASE_URL: str
+    DATABASE_REPLICA_URLS: list[str] = []
+    READ_YOUR_WRITES_SECONDS: int = 5
     HASH_ALGORITHM: str
     JWT_EXPIRE_MINUTES: int
     JWT_SECRET_KEY: str
     JWT_ALGORITHM: str
+    JWT_SECRET_KEYS: dict[str, str] = {}
+    JWT_ACTIVE_KEY_ID: str | None = None
+    JWT_BACKEND: str = "jose"
+    JWT_CACHE_SIZE: int = 10000
     PASSWORD_RESET_TOKEN_EXPIRY_HOURS: int
+    PASSWORD_RESET_MAX_TOKENS_PER_USER: pydantic.conint(ge=1) = 3
+    PASSWORD_RESET_PURGE_INTERVAL_SECONDS: int = 3600
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    SESSION_PURGE_INTERVAL_SECONDS: int = 3600
+    PURGE_BATCH_SIZE: int = 1000
+    BLOG_REAPER_INTERVAL_SECONDS: int = 60
+    IDEMPOTENCY_KEY_TTL_SECONDS: int = 24 * 60 * 60
+    IDEMPOTENCY_PURGE_INTERVAL_SECONDS: int = 3600
+    VIEW_FLUSH_INTERVAL_SECONDS: int = 10
+    VIEW_COUNTER_SHARDS: int = 16
+    AUTHOR_BLOGS_CACHE_SECONDS: int = 30
+    AUTHOR_BLOGS_CACHE_SIZE: int = 1000
+    SSE_QUEUE_SIZE: int = 32
+    SSE_KEEPALIVE_SECONDS: int = 15
+    HEALTH_DB_TIMEOUT_SECONDS: float = 1.0
+    HEALTH_CACHE_SECONDS: float = 1.0
+
+    COMPRESSION_MINIMUM_SIZE: int = 1000
+    BLOG_CONTENT_COMPRESSION: bool = False
+    BLOG_CONTENT_COMPRESSION_MIN_BYTES: int = 4096
+
+    PROFILING_ENABLED: bool = False
+    PROFILING_SLOW_REQUEST_MS: int = 500
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_INTERVAL_MS: int = 5
+    PROFILING_DIR: str = "profiles"
+    PROFILING_MAX_RECORDS: int = 50
+    PROFILING_TOKEN: str | None = None
+
+    MEDIA_ROOT: str = "media"
+    MEDIA_URL: str = "/media"
+    PROFILE_IMAGE_MAX_BYTES: int = 5 * 1024 * 1024
+    PROFILE_IMAGE_SIZES: list[int] = [64, 128, 256]
+    PROCESS_POOL_WORKERS: int = 0
+
+    SERVER_HOST: str = "127.0.0.1"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 0
+    SERVER_KEEP_ALIVE_SECONDS: int = 5
+    SERVER_BACKLOG: int = 2048
+    SERVER_MAX_REQUESTS: int = 0
+    SERVER_MAX_REQUESTS_JITTER: int = 0
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: int = 30
+
+    @pydantic.validator("JWT_ACTIVE_KEY_ID")
+    @classmethod
+    def validate_active_key_id(cls, v, values):
+        if v and v not in values.get("JWT_SECRET_KEYS", {}):
+            raise ValueError("JWT_ACTIVE_KEY_ID is not a key of JWT_SECRET_KEYS")
+        return v
 
     class Config:
         env_file = ".env"
 
 
-settings = Settings()
+_settings: Settings | None = None
+
+
+def get_settings() -> Settings:
+    """Return application settings, reading the environment on first use"""
+    global _settings
+    if _settings is None:
+        _settings = Settings()
+    return _settings
+
+
+def set_settings(new_settings: Settings) -> None:
+    """Replace the active settings, used by the app factory and tests"""
+    global _settings
+    _settings = new_settings
+
+
+def __getattr__(name: str):
+    # Keep `from settings import settings` working without building
+    # Settings() at import time
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
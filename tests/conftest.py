@@ -0,0 +1,159 @@
+from contextlib import contextmanager
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+import models.blog
+import models.comment
+import models.idempotency
+import models.like
+import models.session
+import models.tag
+import models.user
+from db import Base, get_engine
+from main import create_app
+from services.cache import get_caches
+from settings import Settings, set_settings
+
+PASSWORD = "password"
+
+
+class QueryRecorder:
+    """Collects the SQL executed by every engine while recording"""
+
+    def __init__(self):
+        self.statements: list[str] = []
+        self.recording = False
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if self.recording:
+            self.statements.append(statement)
+
+    @contextmanager
+    def budget(self, max_queries: int):
+        """Fail if the block runs more than max_queries statements
+
+        Args:
+            max_queries (int): Number of statements the block may run
+        """
+        self.statements = []
+        self.recording = True
+        try:
+            yield self
+        finally:
+            self.recording = False
+        count = len(self.statements)
+        if count > max_queries:
+            listing = "\n".join(
+                f"{i}. {statement}" for i, statement in enumerate(self.statements, 1)
+            )
+            pytest.fail(
+                f"{count} queries, budget is {max_queries}:\n{listing}", pytrace=False
+            )
+
+
+def override_settings(**values):
+    """Run a test with some settings changed, e.g. @override_settings(DEBUG=True)"""
+    return pytest.mark.parametrize("settings_overrides", [values])
+
+
+@pytest.fixture
+def settings_overrides() -> dict:
+    """Settings to change from the defaults of the settings fixture
+
+    Set with override_settings, or override this fixture in a test module
+    when the values depend on other fixtures such as tmp_path.
+    """
+    return {}
+
+
+@pytest.fixture
+def settings(tmp_path, settings_overrides) -> Settings:
+    """Test settings, also returned by get_settings()"""
+    values = dict(
+        DEBUG=False,
+        API_ENTRYPOINT="/api",
+        DATABASE_URL="sqlite://",
+        HASH_ALGORITHM="bcrypt",
+        JWT_EXPIRE_MINUTES=30,
+        JWT_SECRET_KEY="secret",
+        JWT_ALGORITHM="HS256",
+        PASSWORD_RESET_TOKEN_EXPIRY_HOURS=1,
+        MEDIA_ROOT=str(tmp_path / "media"),
+        PROFILING_DIR=str(tmp_path / "profiles"),
+        PROCESS_POOL_WORKERS=1,
+        # No background jobs, they would run queries between requests
+        SESSION_PURGE_INTERVAL_SECONDS=0,
+        PASSWORD_RESET_PURGE_INTERVAL_SECONDS=0,
+        BLOG_REAPER_INTERVAL_SECONDS=0,
+        IDEMPOTENCY_PURGE_INTERVAL_SECONDS=0,
+        VIEW_FLUSH_INTERVAL_SECONDS=0,
+    )
+    settings = Settings(**{**values, **settings_overrides})
+    set_settings(settings)
+    return settings
+
+
+@pytest.fixture
+def client(settings):
+    """Client of an app with a fresh in-memory database and empty caches"""
+    for cache in get_caches().values():
+        cache.clear()
+    with TestClient(create_app(settings)) as client:
+        Base.metadata.create_all(get_engine())
+        yield client
+
+
+@pytest.fixture
+def queries():
+    recorder = QueryRecorder()
+    event.listen(Engine, "before_cursor_execute", recorder)
+    yield recorder
+    event.remove(Engine, "before_cursor_execute", recorder)
+
+
+def create_user(client: TestClient, username: str) -> dict:
+    """Create a user and log in
+
+    Returns:
+        dict: Tokens of the user and an Authorization header
+    """
+    response = client.post(
+        "/api/users/create",
+        json={"username": username, "password": PASSWORD, "password2": PASSWORD},
+    )
+    assert response.status_code == 200, response.text
+    response = client.post(
+        "/api/users/token", data={"username": username, "password": PASSWORD}
+    )
+    assert response.status_code == 200, response.text
+    tokens = response.json()
+    tokens["headers"] = {"Authorization": f"Bearer {tokens['access_token']}"}
+    return tokens
+
+
+@pytest.fixture
+def user(client) -> dict:
+    return create_user(client, "alice")
+
+
+@pytest.fixture
+def blog(client, user) -> int:
+    response = client.post(
+        "/api/blogs/",
+        json={"title": "Title", "content": "Some content " * 20},
+        headers=user["headers"],
+    )
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+@pytest.fixture
+def comment(client, user, blog) -> int:
+    response = client.post(
+        f"/api/blogs/{blog}/comments", json={"content": "Nice"}, headers=user["headers"]
+    )
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
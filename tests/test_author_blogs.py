@@ -0,0 +1,21 @@
+import sqlalchemy as sa
+
+from db import get_engine
+from models.blog import Blog
+from models.user import User
+
+
+def test_get_user_blogs_after_write_on_other_worker(client, user, blog):
+    client.get("/api/users/alice/blogs")
+    # Another worker's write leaves this worker's cache untouched
+    with get_engine().begin() as connection:
+        connection.execute(
+            sa.insert(Blog.__table__).values(
+                title="Other worker", content="Content", summary="", user_id=1
+            )
+        )
+        connection.execute(
+            sa.update(User.__table__).values(blogs_version=User.blogs_version + 1)
+        )
+    titles = [b["title"] for b in client.get("/api/users/alice/blogs").json()["blogs"]]
+    assert "Other worker" in titles
@@ -0,0 +1,73 @@
+import pytest
+
+from compression import accepts_encoding
+from tests.conftest import override_settings
+
+CONTENT = "Some content " * 100
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        ("gzip", True),
+        ("br, gzip;q=0.5", True),
+        ("*", True),
+        ("gzip;q=0, identity", False),
+        ("*;q=0", False),
+        ("br", False),
+        ("", False),
+    ],
+)
+def test_accepts_encoding(accept_encoding, expected):
+    assert accepts_encoding(accept_encoding, "gzip") is expected
+
+
+gzip_storage_settings = override_settings(
+    BLOG_CONTENT_COMPRESSION=True, BLOG_CONTENT_COMPRESSION_MIN_BYTES=100
+)
+
+
+@gzip_storage_settings
+def test_blog_content_sent_gzipped(client, user):
+    blog_id = client.post(
+        "/api/blogs/",
+        json={"title": "Title", "content": CONTENT},
+        headers=user["headers"],
+    ).json()["id"]
+    response = client.get(
+        f"/api/blogs/{blog_id}/content",
+        headers={"Accept-Encoding": "gzip"},
+    )
+    assert response.headers["content-encoding"] == "gzip"
+    # Decompressed by the client
+    assert response.text == CONTENT
+
+
+@gzip_storage_settings
+def test_blog_content_not_gzipped_when_refused(client, user):
+    blog_id = client.post(
+        "/api/blogs/",
+        json={"title": "Title", "content": CONTENT},
+        headers=user["headers"],
+    ).json()["id"]
+    response = client.get(
+        f"/api/blogs/{blog_id}/content",
+        headers={"Accept-Encoding": "gzip;q=0, identity"},
+    )
+    assert "content-encoding" not in response.headers
+    assert response.text == CONTENT
+
+
+@gzip_storage_settings
+def test_blog_detail_leaves_compressed_body_to_content_url(client, user, queries):
+    blog_id = client.post(
+        "/api/blogs/",
+        json={"title": "Title", "content": CONTENT},
+        headers=user["headers"],
+    ).json()["id"]
+    with queries.budget(1):
+        response = client.get(f"/api/blogs/{blog_id}")
+    assert "blogs.content_gzip AS" not in queries.statements[0]
+    blog = response.json()
+    assert blog["content"] is None
+    assert client.get(blog["content_url"]).text == CONTENT
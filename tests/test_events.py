@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from routers.events import stream
+from services import events
+from services.events import Backend, Hub, LocalBackend, Subscription
+
+
+@pytest.fixture
+def settings_overrides() -> dict:
+    return {"SSE_QUEUE_SIZE": 4}
+
+
+@pytest.fixture
+def hub(settings) -> Hub:
+    return Hub()
+
+
+def test_backend_is_abstract(hub):
+    with pytest.raises(TypeError):
+        Backend(hub)
+
+
+def test_dispatch_fans_out_to_topic_subscribers(hub):
+    async def run():
+        first = hub.subscribe("blogs:1")
+        second = hub.subscribe("blogs:1")
+        other = hub.subscribe("blogs:2")
+        LocalBackend(hub).publish("blogs:1", b"event")
+        # Offers are scheduled on the loop by call_soon_threadsafe
+        await asyncio.sleep(0)
+        return first.queue, second.queue, other.queue
+
+    first, second, other = asyncio.run(run())
+    assert first.get_nowait() == b"event"
+    assert second.get_nowait() == b"event"
+    assert other.empty()
+
+
+def test_slow_subscriber_is_dropped_when_its_queue_fills():
+    async def run():
+        subscription = Subscription("blogs:1", maxsize=2)
+        for i in range(3):
+            subscription.offer(f"{i}".encode())
+        subscription.offer(b"after drop")
+        return subscription
+
+    subscription = asyncio.run(run())
+    assert subscription.dropped
+    # The backlog is freed and the reader is told to close the stream
+    assert subscription.queue.get_nowait() is None
+    assert subscription.queue.empty()
+
+
+def test_disconnect_unsubscribes(hub):
+    # The stream unsubscribes from the app's hub
+    hub = events.hub
+
+    async def run():
+        subscription = hub.subscribe("blogs:1")
+        assert hub.has_subscribers("blogs:1")
+        body = stream(subscription, keepalive_seconds=10)
+        await body.__anext__()
+        # What the server does when the client goes away
+        await body.aclose()
+
+    asyncio.run(run())
+    assert not hub.has_subscribers("blogs:1")
+
+
+def test_like_count_not_queried_without_subscribers(client, user, blog, queries):
+    with queries.budget(10):
+        client.post(f"/api/likes/{blog}", headers=user["headers"])
+    assert not any("count(" in statement.lower() for statement in queries.statements)
+    assert not events.has_subscribers(events.blog_topic(blog))
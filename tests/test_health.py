@@ -0,0 +1,49 @@
+import threading
+
+from sqlalchemy.engine import make_url
+
+from routers import health
+from tests.conftest import override_settings
+
+
+def test_probe_connect_args():
+    assert health.probe_connect_args(make_url("sqlite:///blog.db"), 0.5) == {
+        "timeout": 0.5
+    }
+    assert health.probe_connect_args(make_url("postgresql://db/blog"), 0.5) == {
+        "connect_timeout": 2,
+        "options": "-c statement_timeout=500",
+    }
+    assert health.probe_connect_args(make_url("mysql://db/blog"), 1.5) == {
+        "connect_timeout": 2,
+        "read_timeout": 2,
+    }
+
+
+@override_settings(HEALTH_DB_TIMEOUT_SECONDS=0.05, HEALTH_CACHE_SECONDS=0)
+def test_hung_database_holds_one_thread(client, monkeypatch):
+    released = threading.Event()
+    calls = []
+
+    def hang(engine):
+        calls.append(engine)
+        released.wait(5)
+        return 0.0
+
+    monkeypatch.setattr(health, "check_database", hang)
+    try:
+        for _ in range(3):
+            response = client.get("/api/health/ready")
+            assert response.status_code == 503
+            assert response.json()["database"]["status"] == "timeout"
+        assert len(calls) == 1
+    finally:
+        released.set()
+
+
+def test_ready_reports_checkout_wait(client, blog):
+    response = client.get("/api/health/ready")
+    assert response.status_code == 200
+    wait = response.json()["pools"]["primary"]["checkout_wait"]
+    assert wait["checkouts"] > 0
+    assert 0 <= wait["avg_ms"] <= wait["max_ms"]
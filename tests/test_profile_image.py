@@ -0,0 +1,31 @@
+from starlette.requests import Request
+
+from tests.conftest import override_settings
+
+
+def upload(client, user, data: bytes):
+    return client.post(
+        "/api/users/profile-image",
+        files={"image": ("avatar.png", data, "image/png")},
+        headers=user["headers"],
+    )
+
+
+@override_settings(PROFILE_IMAGE_MAX_BYTES=1024)
+def test_large_upload_rejected_before_reading(client, user, monkeypatch):
+    def form(self):
+        raise AssertionError("The body was read")
+
+    monkeypatch.setattr(Request, "form", form)
+    response = upload(client, user, b"x" * (64 * 1024))
+    assert response.status_code == 413
+
+
+@override_settings(PROFILE_IMAGE_MAX_BYTES=1024)
+def test_upload_over_limit_within_overhead_rejected(client, user):
+    response = upload(client, user, b"x" * 2048)
+    assert response.status_code == 413
+
+
+def test_invalid_image_rejected(client, user):
+    assert upload(client, user, b"not an image").status_code == 400
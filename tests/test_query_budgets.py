@@ -0,0 +1,452 @@
+"""Number of SQL statements each endpoint may run
+
+Raise a budget only together with the change that needs the extra query.
+"""
+import io
+import threading
+import time
+
+import pytest
+from fastapi.routing import APIRoute
+from PIL import Image
+
+from services import events
+from tests.conftest import PASSWORD, create_user, override_settings
+
+BUDGETS = {
+    "ping": 0,
+    "health_live": 0,
+    "health_ready": 1,
+    "get_profiles": 0,
+    "create_user": 3,
+    "login": 2,
+    "refresh_token": 3,
+    "revoke_token": 1,
+    "get_me": 2,
+    "get_user_blogs": 2,
+    "get_user_blogs_cached": 1,
+    "get_user_blogs_next_page": 2,
+    "upload_profile_image": 4,
+    "change_password": 4,
+    "get_password_reset_token": 3,
+    "reset_password": 6,
+    "get_blogs": 2,
+    "get_top_blogs": 1,
+    "get_blog": 1,
+    "get_blog_content": 1,
+    "get_blog_events": 1,
+    "get_blogs_by_tag": 1,
+    "get_tags": 1,
+    "create_blog": 6,
+    "create_blog_with_tags": 10,
+    "create_blog_with_idempotency_key": 8,
+    "replay_create_blog": 2,
+    "update_blog": 7,
+    "delete_blog": 5,
+    "get_comments": 2,
+    "get_comment_threads": 3,
+    "get_comment_tree": 3,
+    "create_comment": 4,
+    "create_reply": 5,
+    "update_comment": 4,
+    "delete_comment": 3,
+    "like_post": 4,
+    "unlike_post": 4,
+    "add_like": 3,
+    "add_like_again": 3,
+    "remove_like": 2,
+}
+
+# Endpoints whose budget is named after the action rather than the function
+BUDGET_NAMES = {
+    "login_for_access_token": "login",
+    "refresh_access_token": "refresh_token",
+    "revoke_refresh_token": "revoke_token",
+    "password_reset": "reset_password",
+    "live": "health_live",
+    "ready": "health_ready",
+}
+
+# Endpoints without a budget and why
+EXEMPT = {
+    "get_media": "serves files from MEDIA_ROOT without touching the database",
+}
+
+
+# Profiles every request and includes the profiles router
+profiling_enabled = override_settings(
+    PROFILING_ENABLED=True, PROFILING_SLOW_REQUEST_MS=0, PROFILING_TOKEN="token"
+)
+
+
+@profiling_enabled
+def test_every_route_has_a_budget(client):
+    missing = [
+        f"{','.join(sorted(route.methods))} {route.path} ({route.name})"
+        for route in client.app.routes
+        if isinstance(route, APIRoute)
+        and route.name not in EXEMPT
+        and BUDGET_NAMES.get(route.name, route.name) not in BUDGETS
+    ]
+    assert not missing, f"Routes without a query budget: {missing}"
+
+
+def test_ping(client, queries):
+    with queries.budget(BUDGETS["ping"]):
+        response = client.get("/api/ping")
+    assert response.status_code == 200
+
+
+def test_health_live(client, queries):
+    with queries.budget(BUDGETS["health_live"]):
+        response = client.get("/api/health/live")
+    assert response.status_code == 200
+
+
+def test_health_ready(client, queries):
+    with queries.budget(BUDGETS["health_ready"]):
+        response = client.get("/api/health/ready")
+    assert response.status_code == 200
+    assert response.json()["database"]["status"] == "ok"
+
+
+@profiling_enabled
+def test_get_profiles(client, user, queries):
+    headers = {"X-Profiling-Token": "token"}
+    assert client.get("/api/debug/profiles").status_code == 403
+    with queries.budget(BUDGETS["get_profiles"]):
+        response = client.get("/api/debug/profiles", headers=headers)
+    assert response.status_code == 200
+    routes = {profile["route"] for profile in response.json()["profiles"]}
+    assert "/api/users/token" in routes
+
+
+def test_create_user(client, queries):
+    with queries.budget(BUDGETS["create_user"]):
+        response = client.post(
+            "/api/users/create",
+            json={"username": "bob", "password": PASSWORD, "password2": PASSWORD},
+        )
+    assert response.status_code == 200
+
+
+def test_login(client, user, queries):
+    with queries.budget(BUDGETS["login"]):
+        response = client.post(
+            "/api/users/token", data={"username": "alice", "password": PASSWORD}
+        )
+    assert response.status_code == 200
+
+
+def test_refresh_token(client, user, queries):
+    with queries.budget(BUDGETS["refresh_token"]):
+        response = client.post(
+            "/api/users/token/refresh", json={"refresh_token": user["refresh_token"]}
+        )
+    assert response.status_code == 200
+
+
+def test_revoke_token(client, user, queries):
+    with queries.budget(BUDGETS["revoke_token"]):
+        response = client.post(
+            "/api/users/token/revoke", json={"refresh_token": user["refresh_token"]}
+        )
+    assert response.status_code == 204
+
+
+def test_get_me(client, user, blog, queries):
+    with queries.budget(BUDGETS["get_me"]):
+        response = client.get("/api/users/", headers=user["headers"])
+    assert response.status_code == 200
+
+
+def test_get_user_blogs(client, user, blog, queries):
+    with queries.budget(BUDGETS["get_user_blogs"]):
+        response = client.get("/api/users/alice/blogs?limit=1")
+    assert response.status_code == 200
+
+    with queries.budget(BUDGETS["get_user_blogs_cached"]):
+        cached = client.get("/api/users/alice/blogs?limit=1")
+    assert cached.json() == response.json()
+
+
+def test_get_user_blogs_next_page(client, user, blog, queries):
+    client.post(
+        "/api/blogs/",
+        json={"title": "Newer", "content": "Content"},
+        headers=user["headers"],
+    )
+    cursor = client.get("/api/users/alice/blogs?limit=1").json()["next_cursor"]
+    with queries.budget(BUDGETS["get_user_blogs_next_page"]):
+        response = client.get(f"/api/users/alice/blogs?limit=1&cursor={cursor}")
+    assert [blog["id"] for blog in response.json()["blogs"]] == [blog]
+
+
+def test_upload_profile_image(client, user, queries):
+    image = io.BytesIO()
+    Image.new("RGB", (300, 200), "red").save(image, format="PNG")
+    with queries.budget(BUDGETS["upload_profile_image"]):
+        response = client.post(
+            "/api/users/profile-image",
+            files={"image": ("avatar.png", image.getvalue(), "image/png")},
+            headers=user["headers"],
+        )
+    assert response.status_code == 200
+
+
+def test_change_password(client, user, queries):
+    with queries.budget(BUDGETS["change_password"]):
+        response = client.post(
+            "/api/users/change-password",
+            data={"current_password": PASSWORD, "new_password": "new password"},
+            headers=user["headers"],
+        )
+    assert response.status_code == 200
+
+
+def test_get_password_reset_token(client, user, queries):
+    with queries.budget(BUDGETS["get_password_reset_token"]):
+        response = client.post(
+            "/api/users/get-password-reset-token", json={"username": "alice"}
+        )
+    assert response.status_code == 200
+
+
+def test_reset_password(client, user, queries):
+    token = client.post(
+        "/api/users/get-password-reset-token", json={"username": "alice"}
+    ).json()["reset_token"]
+    with queries.budget(BUDGETS["reset_password"]):
+        response = client.post(
+            f"/api/users/password-reset/{token}", json={"password": "new password"}
+        )
+    assert response.status_code == 201
+
+
+def test_get_blogs(client, blog, queries):
+    with queries.budget(BUDGETS["get_blogs"]):
+        response = client.get("/api/blogs/")
+    assert response.status_code == 200
+
+
+def test_get_top_blogs(client, blog, queries):
+    with queries.budget(BUDGETS["get_top_blogs"]):
+        response = client.get("/api/blogs/top")
+    assert response.status_code == 200
+
+
+def test_get_blog(client, blog, queries):
+    with queries.budget(BUDGETS["get_blog"]):
+        response = client.get(f"/api/blogs/{blog}")
+    assert response.status_code == 200
+
+
+def test_get_blog_content(client, blog, queries):
+    with queries.budget(BUDGETS["get_blog_content"]):
+        response = client.get(f"/api/blogs/{blog}/content")
+    assert response.status_code == 200
+
+
+# The stream ends once its one slot queue overflows and the subscriber is
+# dropped, otherwise the test client would read it forever
+@override_settings(SSE_QUEUE_SIZE=1)
+def test_get_blog_events(client, blog, queries):
+    topic = events.blog_topic(blog)
+
+    def overflow():
+        deadline = time.monotonic() + 5
+        while not events.hub.stats()["subscriptions"]:
+            if time.monotonic() > deadline:
+                return
+            time.sleep(0.01)
+        for i in range(100):
+            events.hub.dispatch(topic, events.format_event("ping", {"i": i}))
+
+    thread = threading.Thread(target=overflow)
+    thread.start()
+    with queries.budget(BUDGETS["get_blog_events"]):
+        response = client.get(f"/api/blogs/{blog}/events")
+    thread.join()
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+
+def test_get_blogs_by_tag(client, user, queries):
+    for tags in (["python", "sql"], ["python"], ["go"]):
+        client.post(
+            "/api/blogs/",
+            json={"title": "Title", "content": "Content", "tags": tags},
+            headers=user["headers"],
+        )
+    with queries.budget(BUDGETS["get_blogs_by_tag"]):
+        response = client.get("/api/blogs/?tag=python&tag=sql")
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+
+    response = client.get("/api/blogs/?tag=python&tag=go&match=any")
+    assert len(response.json()) == 3
+
+
+def test_get_tags(client, user, queries):
+    client.post(
+        "/api/blogs/",
+        json={"title": "Title", "content": "Content", "tags": ["python"]},
+        headers=user["headers"],
+    )
+    with queries.budget(BUDGETS["get_tags"]):
+        response = client.get("/api/blogs/tags")
+    assert response.status_code == 200
+    assert response.json() == [{"name": "python", "blog_count": 1}]
+
+
+def test_create_blog(client, user, queries):
+    with queries.budget(BUDGETS["create_blog"]):
+        response = client.post(
+            "/api/blogs/",
+            json={"title": "Title", "content": "Content"},
+            headers=user["headers"],
+        )
+    assert response.status_code == 200
+
+
+def test_create_blog_with_tags(client, user, queries):
+    with queries.budget(BUDGETS["create_blog_with_tags"]):
+        response = client.post(
+            "/api/blogs/",
+            json={"title": "Title", "content": "Content", "tags": ["python", "sql"]},
+            headers=user["headers"],
+        )
+    assert response.status_code == 200
+    assert response.json()["tags"] == ["python", "sql"]
+
+
+def test_create_blog_with_idempotency_key(client, user, queries):
+    headers = {**user["headers"], "Idempotency-Key": "retry-me"}
+    new_blog = {"title": "Title", "content": "Content"}
+    with queries.budget(BUDGETS["create_blog_with_idempotency_key"]):
+        response = client.post("/api/blogs/", json=new_blog, headers=headers)
+    assert response.status_code == 200
+
+    with queries.budget(BUDGETS["replay_create_blog"]):
+        replayed = client.post("/api/blogs/", json=new_blog, headers=headers)
+    assert replayed.status_code == 200
+    assert replayed.headers["Idempotent-Replayed"] == "true"
+    assert replayed.json() == response.json()
+
+
+def test_update_blog(client, user, blog, queries):
+    with queries.budget(BUDGETS["update_blog"]):
+        response = client.put(
+            f"/api/blogs/{blog}",
+            json={"title": "New title", "content": "New content"},
+            headers=user["headers"],
+        )
+    assert response.status_code == 200
+
+
+def test_delete_blog(client, user, blog, queries):
+    with queries.budget(BUDGETS["delete_blog"]):
+        response = client.delete(f"/api/blogs/{blog}", headers=user["headers"])
+    assert response.status_code == 204
+
+
+def test_get_comments(client, blog, comment, queries):
+    with queries.budget(BUDGETS["get_comments"]):
+        response = client.get(f"/api/blogs/{blog}/comments")
+    assert response.status_code == 200
+
+
+@pytest.fixture
+def replies(client, user, blog, comment) -> list[int]:
+    ids = []
+    for parent_id in (comment, comment, None):
+        response = client.post(
+            f"/api/blogs/{blog}/comments",
+            json={"content": "Reply", "parent_id": parent_id},
+            headers=user["headers"],
+        )
+        ids.append(response.json()["id"])
+    return ids
+
+
+def test_get_comment_threads(client, blog, replies, queries):
+    with queries.budget(BUDGETS["get_comment_threads"]):
+        response = client.get(f"/api/blogs/{blog}/comments/threads")
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+
+
+def test_get_comment_tree(client, comment, replies, queries):
+    with queries.budget(BUDGETS["get_comment_tree"]):
+        response = client.get(f"/api/blogs/comments/{comment}/tree")
+    assert response.status_code == 200
+    assert len(response.json()["replies"]) == 2
+
+
+def test_create_comment(client, user, blog, queries):
+    with queries.budget(BUDGETS["create_comment"]):
+        response = client.post(
+            f"/api/blogs/{blog}/comments",
+            json={"content": "Nice"},
+            headers=user["headers"],
+        )
+    assert response.status_code == 200
+
+
+def test_create_reply(client, user, blog, comment, queries):
+    with queries.budget(BUDGETS["create_reply"]):
+        response = client.post(
+            f"/api/blogs/{blog}/comments",
+            json={"content": "Reply", "parent_id": comment},
+            headers=user["headers"],
+        )
+    assert response.status_code == 200
+
+
+def test_update_comment(client, user, comment, queries):
+    with queries.budget(BUDGETS["update_comment"]):
+        response = client.put(
+            f"/api/blogs/comments/{comment}",
+            json={"content": "Edited"},
+            headers=user["headers"],
+        )
+    assert response.status_code == 200
+
+
+def test_delete_comment(client, user, comment, queries):
+    with queries.budget(BUDGETS["delete_comment"]):
+        response = client.delete(
+            f"/api/blogs/comments/{comment}", headers=user["headers"]
+        )
+    assert response.status_code == 204
+
+
+def test_like_post(client, user, blog, queries):
+    with queries.budget(BUDGETS["like_post"]):
+        response = client.post(f"/api/likes/{blog}", headers=user["headers"])
+    assert response.status_code == 201
+
+
+def test_unlike_post(client, user, blog, queries):
+    other = create_user(client, "bob")
+    client.post(f"/api/likes/{blog}", headers=other["headers"])
+    with queries.budget(BUDGETS["unlike_post"]):
+        response = client.post(f"/api/likes/{blog}", headers=other["headers"])
+    assert response.status_code == 200
+
+
+def test_add_like(client, user, blog, queries):
+    with queries.budget(BUDGETS["add_like"]):
+        response = client.put(f"/api/likes/{blog}", headers=user["headers"])
+    assert response.status_code == 204
+
+    with queries.budget(BUDGETS["add_like_again"]):
+        response = client.put(f"/api/likes/{blog}", headers=user["headers"])
+    assert response.status_code == 204
+
+
+def test_remove_like(client, user, blog, queries):
+    client.put(f"/api/likes/{blog}", headers=user["headers"])
+    with queries.budget(BUDGETS["remove_like"]):
+        response = client.delete(f"/api/likes/{blog}", headers=user["headers"])
+    assert response.status_code == 204
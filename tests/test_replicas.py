@@ -0,0 +1,54 @@
+import pytest
+import sqlalchemy as sa
+
+from db import Base, get_engines
+from dependencies import READ_PRIMARY_COOKIE
+from models.blog import Blog
+
+
+@pytest.fixture
+def settings_overrides(tmp_path) -> dict:
+    """A primary and a replica SQLite file"""
+    return {
+        "DATABASE_URL": f"sqlite:///{tmp_path / 'primary.db'}",
+        "DATABASE_REPLICA_URLS": [f"sqlite:///{tmp_path / 'replica.db'}"],
+    }
+
+
+def test_reads_go_to_replica_until_client_writes(client, user):
+    engines = get_engines()
+    Base.metadata.create_all(engines["replica_0"])
+    client.cookies.clear()
+
+    response = client.post(
+        "/api/blogs/",
+        json={"title": "Primary", "content": "Content"},
+        headers=user["headers"],
+    )
+    assert response.status_code == 200
+    assert READ_PRIMARY_COOKIE in response.cookies
+    blog_id = response.json()["id"]
+
+    # The writer reads its own write from the primary
+    response = client.get(f"/api/blogs/{blog_id}")
+    assert response.status_code == 200
+    assert response.json()["title"] == "Primary"
+
+    # Other clients read the replica, which has not caught up yet
+    client.cookies.clear()
+    assert client.get(f"/api/blogs/{blog_id}").status_code == 404
+
+    with engines["replica_0"].begin() as connection:
+        connection.execute(
+            sa.insert(Blog.__table__).values(
+                id=blog_id, title="Replica", content="Content", summary="", user_id=1
+            )
+        )
+    response = client.get(f"/api/blogs/{blog_id}")
+    assert response.status_code == 200
+    assert response.json()["title"] == "Replica"
+    # Reads don't mark the client
+    assert READ_PRIMARY_COOKIE not in response.cookies
+
+    pools = client.get("/api/health/ready").json()["pools"]
+    assert pools["replica_0"]["checkout_wait"]["checkouts"] > 0
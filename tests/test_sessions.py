@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+from sqlalchemy import event
+
+from db import get_engine
+from models.session import UserSession
+from tests.conftest import PASSWORD
+from utils import hash_token
+
+
+def refresh(client, refresh_token: str):
+    return client.post(
+        "/api/users/token/refresh", json={"refresh_token": refresh_token}
+    )
+
+
+def test_refresh_rotates_token(client, user):
+    response = refresh(client, user["refresh_token"])
+    assert response.status_code == 200
+    new_token = response.json()["refresh_token"]
+    assert new_token != user["refresh_token"]
+    assert refresh(client, new_token).status_code == 200
+
+
+def test_reused_token_revokes_every_session(client, user):
+    new_token = refresh(client, user["refresh_token"]).json()["refresh_token"]
+
+    assert refresh(client, user["refresh_token"]).status_code == 401
+    # The thief's token and the legitimate one are both gone
+    assert refresh(client, new_token).status_code == 401
+
+
+def test_expired_token_is_rejected(client, user):
+    with get_engine().begin() as connection:
+        connection.execute(
+            sa.update(UserSession)
+            .where(UserSession.token_hash == hash_token(user["refresh_token"]))
+            .values(expires_at=datetime.utcnow() - timedelta(seconds=1))
+        )
+    assert refresh(client, user["refresh_token"]).status_code == 401
+
+
+def test_concurrent_rotation_counts_as_reuse(client, user):
+    """A token revoked between the lookup and the update is not rotated twice"""
+    engine = get_engine()
+    raced = False
+
+    def revoke_first(conn, cursor, statement, parameters, context, executemany):
+        nonlocal raced
+        if not raced and statement.startswith("UPDATE user_sessions"):
+            raced = True
+            # Another request rotating the same token got there first
+            cursor.execute(
+                "UPDATE user_sessions SET revoked_at = ? WHERE token_hash = ?",
+                (datetime.utcnow(), hash_token(user["refresh_token"])),
+            )
+
+    event.listen(engine, "before_cursor_execute", revoke_first)
+    try:
+        response = refresh(client, user["refresh_token"])
+    finally:
+        event.remove(engine, "before_cursor_execute", revoke_first)
+    assert raced
+    assert response.status_code == 401
+    with engine.connect() as connection:
+        active = connection.execute(
+            sa.select(sa.func.count()).where(UserSession.revoked_at.is_(None))
+        ).scalar()
+    assert active == 0
+
+
+def test_change_password_revokes_sessions(client, user):
+    response = client.post(
+        "/api/users/change-password",
+        data={"current_password": PASSWORD, "new_password": "new password"},
+        headers=user["headers"],
+    )
+    assert response.status_code == 200
+    assert refresh(client, user["refresh_token"]).status_code == 401
+
+
+def test_reset_password_revokes_sessions(client, user):
+    token = client.post(
+        "/api/users/get-password-reset-token", json={"username": "alice"}
+    ).json()["reset_token"]
+    response = client.post(
+        f"/api/users/password-reset/{token}", json={"password": "new password"}
+    )
+    assert response.status_code == 201
+    assert refresh(client, user["refresh_token"]).status_code == 401
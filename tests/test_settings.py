@@ -0,0 +1,12 @@
+import pydantic
+import pytest
+
+from settings import Settings
+
+
+@pytest.mark.parametrize("max_tokens", [0, -1])
+def test_password_reset_keeps_at_least_one_token(settings, max_tokens):
+    with pytest.raises(pydantic.ValidationError):
+        Settings(
+            **{**settings.dict(), "PASSWORD_RESET_MAX_TOKENS_PER_USER": max_tokens}
+        )
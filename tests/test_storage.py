@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from main import create_app
+from services.storage import LocalStorage, Storage, get_storage
+
+
+def test_storage_is_abstract():
+    with pytest.raises(TypeError):
+        Storage()
+
+
+def test_each_app_uses_its_own_media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path / "first")
+    create_app(settings)
+    assert get_storage().root == str(tmp_path / "first")
+
+    settings.MEDIA_ROOT = str(tmp_path / "second")
+    create_app(settings)
+    storage = get_storage()
+    assert isinstance(storage, LocalStorage)
+    assert storage.root == str(tmp_path / "second")
+
+
+def test_create_app_does_not_import_pillow():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = (
+        "import sys\n"
+        "from main import create_app\n"
+        "from settings import Settings\n"
+        "create_app(Settings(DEBUG=False, API_ENTRYPOINT='/api', "
+        "DATABASE_URL='sqlite://', HASH_ALGORITHM='bcrypt', JWT_EXPIRE_MINUTES=1, "
+        "JWT_SECRET_KEY='s', JWT_ALGORITHM='HS256', "
+        "PASSWORD_RESET_TOKEN_EXPIRY_HOURS=1))\n"
+        "print('PIL' in sys.modules)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=root, capture_output=True, text=True
+    )
+    assert result.stdout.strip() == "False", result.stderr
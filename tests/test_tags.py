@@ -0,0 +1,45 @@
+def tag_counts(client) -> dict[str, int]:
+    return {
+        tag["name"]: tag["blog_count"] for tag in client.get("/api/blogs/tags").json()
+    }
+
+
+def create_tagged_blog(client, user) -> int:
+    response = client.post(
+        "/api/blogs/",
+        json={"title": "Title", "content": "Content", "tags": ["python", "sql"]},
+        headers=user["headers"],
+    )
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+def test_update_without_tags_keeps_them(client, user):
+    blog_id = create_tagged_blog(client, user)
+    response = client.put(
+        f"/api/blogs/{blog_id}",
+        json={"title": "New title", "content": "New content"},
+        headers=user["headers"],
+    )
+    assert response.status_code == 200
+    assert response.json()["tags"] == ["python", "sql"]
+    assert tag_counts(client) == {"python": 1, "sql": 1}
+
+
+def test_update_with_tags_replaces_them(client, user):
+    blog_id = create_tagged_blog(client, user)
+    response = client.put(
+        f"/api/blogs/{blog_id}",
+        json={"title": "Title", "content": "Content", "tags": ["Go", "python"]},
+        headers=user["headers"],
+    )
+    assert response.json()["tags"] == ["go", "python"]
+    assert tag_counts(client) == {"go": 1, "python": 1}
+
+    response = client.put(
+        f"/api/blogs/{blog_id}",
+        json={"title": "Title", "content": "Content", "tags": []},
+        headers=user["headers"],
+    )
+    assert response.json()["tags"] == []
+    assert tag_counts(client) == {}
@@ -0,0 +1,106 @@
+import time
+
+import pytest
+
+from services import cache, tokens
+from tests.conftest import override_settings
+
+
+@pytest.fixture(params=["jose", "pyjwt"])
+def settings_overrides(request) -> dict:
+    """Two signing keys, the first one active, with each JWT backend"""
+    if request.param == "pyjwt":
+        # Optional, only needed for JWT_BACKEND=pyjwt
+        pytest.importorskip("jwt")
+    return {
+        "JWT_BACKEND": request.param,
+        "JWT_SECRET_KEYS": {"a": "key-a", "b": "key-b"},
+        "JWT_ACTIVE_KEY_ID": "a",
+    }
+
+
+@pytest.fixture
+def keys(settings):
+    tokens.configure(settings)
+    return settings
+
+
+def claims(seconds: int = 60) -> dict:
+    return {"sub": "alice", "exp": int(time.time()) + seconds}
+
+
+def test_token_carries_active_key_id(keys):
+    token = tokens.encode(claims())
+    assert tokens.get_backend().get_unverified_header(token)["kid"] == "a"
+    assert tokens.decode(token)["sub"] == "alice"
+
+
+def test_tokens_of_previous_key_stay_valid(keys):
+    token = tokens.encode(claims())
+    keys.JWT_ACTIVE_KEY_ID = "b"
+    new_token = tokens.encode(claims())
+
+    assert tokens.get_backend().get_unverified_header(new_token)["kid"] == "b"
+    assert tokens.decode(token)["sub"] == "alice"
+    assert tokens.decode(new_token)["sub"] == "alice"
+
+
+def test_legacy_token_without_key_id(keys):
+    keys.JWT_ACTIVE_KEY_ID = None
+    token = tokens.encode(claims())
+    assert "kid" not in tokens.get_backend().get_unverified_header(token)
+
+    keys.JWT_ACTIVE_KEY_ID = "a"
+    assert tokens.decode(token)["sub"] == "alice"
+
+
+def test_unknown_key_id_is_rejected(keys):
+    token = tokens.get_backend().encode(claims(), "key-a", "HS256", {"kid": "c"})
+    with pytest.raises(tokens.InvalidTokenError):
+        tokens.decode(token)
+
+
+def test_key_id_must_match_signing_key(keys):
+    token = tokens.get_backend().encode(claims(), "key-a", "HS256", {"kid": "b"})
+    with pytest.raises(tokens.InvalidTokenError):
+        tokens.decode(token)
+
+
+def test_malformed_token_is_rejected(keys):
+    with pytest.raises(tokens.InvalidTokenError):
+        tokens.decode("not a token")
+
+
+def test_expired_token_is_rejected(keys):
+    token = tokens.encode(claims(-10))
+    with pytest.raises(tokens.InvalidTokenError):
+        tokens.decode(token)
+
+
+def test_claims_are_cached_until_exp(keys, monkeypatch):
+    backend = tokens.get_backend()
+    verified = []
+    decode = backend.decode
+
+    def counting_decode(*args):
+        verified.append(args[0])
+        return decode(*args)
+
+    monkeypatch.setattr(backend, "decode", counting_decode)
+    token_claims = claims()
+    token = tokens.encode(token_claims)
+
+    tokens.decode(token)
+    tokens.decode(token)
+    assert len(verified) == 1
+
+    # Past exp the cached claims are dropped and the token verified again
+    monkeypatch.setattr(cache.time, "time", lambda: token_claims["exp"] + 1)
+    tokens.decode(token)
+    assert len(verified) == 2
+
+
+@override_settings(JWT_BACKEND="other")
+def test_unknown_backend_is_rejected(settings):
+    with pytest.raises(ValueError):
+        tokens.configure(settings)
@@ -0,0 +1,68 @@
+import sqlalchemy as sa
+
+from db import Base, build_engine, get_engine
+from scripts import transfer
+from scripts.transfer import TABLES, Checkpoint, export_table, import_table
+
+
+def dump(engine) -> dict[str, list]:
+    with engine.connect() as connection:
+        return {
+            name: [
+                tuple(row)
+                for row in connection.execute(
+                    sa.select(table).order_by(transfer.primary_key(table))
+                )
+            ]
+            for name, table in TABLES.items()
+        }
+
+
+def test_export_import_round_trip(client, user, blog, comment, tmp_path):
+    for i in range(4):
+        client.post(
+            "/api/blogs/",
+            json={"title": f"Blog {i}", "content": "Content"},
+            headers=user["headers"],
+        )
+    client.post(f"/api/likes/{blog}", headers=user["headers"])
+    source = get_engine()
+    target = build_engine(f"sqlite:///{tmp_path / 'target.db'}")
+    Base.metadata.create_all(target)
+    directory = str(tmp_path)
+
+    for table in TABLES.values():
+        export_table(source, table, directory, batch_size=2, resume=False)
+    for table in TABLES.values():
+        import_table(target, table, directory, 2, resume=False, copy=False)
+
+    expected = dump(source)
+    assert len(expected["blogs"]) == 5
+    assert dump(target) == expected
+
+
+def test_resume_skips_rows_committed_without_checkpoint(client, user, blog, tmp_path):
+    for i in range(4):
+        client.post(
+            "/api/blogs/",
+            json={"title": f"Blog {i}", "content": "Content"},
+            headers=user["headers"],
+        )
+    source = get_engine()
+    target = build_engine(f"sqlite:///{tmp_path / 'target.db'}")
+    Base.metadata.create_all(target)
+    directory = str(tmp_path)
+    blogs = TABLES["blogs"]
+    for table in TABLES.values():
+        export_table(source, table, directory, batch_size=2, resume=False)
+    import_table(target, TABLES["users"], directory, 2, resume=False, copy=False)
+    import_table(target, blogs, directory, 2, resume=False, copy=False)
+
+    # The process died after committing every batch but before any checkpoint
+    Checkpoint(directory, "blogs", "import").save(
+        {"last_pk": None, "offset": 0, "rows": 0}
+    )
+    import_table(target, blogs, directory, 2, resume=True, copy=False)
+
+    assert dump(target)["blogs"] == dump(source)["blogs"]
+    assert Checkpoint(directory, "blogs", "import").load()["done"]
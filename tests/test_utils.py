@@ -0,0 +1,30 @@
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from db import get_engine
+from models.tag import Tag
+from utils import insert_each_in_savepoint, insert_ignore
+
+
+def tag_names() -> list[str]:
+    with get_engine().connect() as connection:
+        return (
+            connection.execute(sa.select(Tag.name).order_by(Tag.name)).scalars().all()
+        )
+
+
+def test_insert_ignore_skips_existing_rows(client):
+    with Session(get_engine()) as db:
+        assert insert_ignore(db, Tag, [{"name": "python"}, {"name": "sql"}]) == 2
+        assert insert_ignore(db, Tag, [{"name": "python"}, {"name": "go"}]) == 1
+        db.commit()
+    assert tag_names() == ["go", "python", "sql"]
+
+
+def test_savepoint_fallback_keeps_earlier_rows(client):
+    with Session(get_engine()) as db:
+        assert insert_ignore(db, Tag, {"name": "python"}) == 1
+        rows = [{"name": "python"}, {"name": "sql"}]
+        assert insert_each_in_savepoint(db, Tag, rows) == 1
+        db.commit()
+    assert tag_names() == ["python", "sql"]
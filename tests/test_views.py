@@ -0,0 +1,49 @@
+import threading
+
+import sqlalchemy as sa
+
+from db import get_engine
+from models.blog import Blog
+from services import views
+from services.views import ShardedCounter
+
+
+def test_threads_use_different_shards():
+    counter = ShardedCounter(4)
+    indexes = []
+
+    def count():
+        indexes.append(counter.shard_index())
+        counter.increment(1)
+
+    threads = [threading.Thread(target=count) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(indexes) == [0, 1, 2, 3]
+    assert counter.drain() == {1: 4}
+
+
+def test_flush_writes_views_counted_by_threads(client, blog):
+    views.get_counter().drain()
+    barrier = threading.Barrier(8)
+
+    def read():
+        barrier.wait()
+        for _ in range(100):
+            views.record(blog)
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert views.flush() == 1
+    with get_engine().connect() as connection:
+        count = connection.execute(
+            sa.select(Blog.views).where(Blog.id == blog)
+        ).scalar()
+    assert count == 800
+    assert views.flush() == 0
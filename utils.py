@@ -1,17 +1,37 @@
+import hashlib
+
+import sqlalchemy as sa
 from fastapi import HTTPException, status
 from loguru import logger
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
 from sqlalchemy.orm.decl_api import DeclarativeMeta
 
-from db import engine
 
+def hash_token(token: str) -> str:
+    """Hash a random token for storage
 
-def get_object_or_404(model: DeclarativeMeta, pk: int):
-    """Get a single object from database
+    Tokens are long random strings, so a plain digest is enough to store
+    them safely and keeps lookups off the password hashing path.
 
     Args:
+        token (str): Token to hash
+
+    Returns:
+        str: Hex digest of the token
+    """
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def get_object_or_404(db: Session, model: DeclarativeMeta, pk: int, *options):
+    """Get a single object from database, treating soft deleted rows as missing
+
+    Args:
+        db (Session): Session of the current request
         model (_type_): Model to query
         pk (int): Primary key of the model
+        *options: Loader options for the query, e.g. undefer()
 
     Raises:
         HTTPException: If no object is found
@@ -19,13 +39,101 @@ def get_object_or_404(model: DeclarativeMeta, pk: int):
     Returns:
         The object instance or None
     """
-    with Session(engine) as db:
-        logger.info(f"Querying table: {model.__tablename__}, with pk: {pk}")
-        result = db.query(model).get(pk)
-        if not result:
-            logger.info(f"Object not found with id {pk}")
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Object not found"
-            )
+    logger.info(f"Querying table: {model.__tablename__}, with pk: {pk}")
+    result = db.query(model).options(*options).get(pk)
+    if not result or getattr(result, "deleted_at", None) is not None:
+        logger.info(f"Object not found with id {pk}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Object not found"
+        )
     logger.info(f"Object found with id {pk}")
     return result
+
+
+def delete_in_batches(
+    db: Session, model: DeclarativeMeta, condition: ColumnElement, batch_size: int
+) -> int:
+    """Delete matching rows a batch at a time, committing after each batch
+
+    Short transactions keep locks brief while large backlogs are removed.
+
+    Args:
+        db (Session): Session to delete with
+        model (DeclarativeMeta): Model with a single column primary key
+        condition (ColumnElement): Filter selecting the rows to delete
+        batch_size (int): Maximum number of rows per transaction
+
+    Returns:
+        int: Number of deleted rows
+    """
+    pk = model.__mapper__.primary_key[0]
+    deleted = 0
+    while True:
+        ids = db.query(pk.label("pk")).filter(condition).limit(batch_size).subquery()
+        count = (
+            db.query(model)
+            .filter(pk.in_(db.query(ids.c.pk)))
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+        deleted += count
+        if count < batch_size:
+            return deleted
+
+
+def insert_ignore(
+    db: Session, model: DeclarativeMeta, values: dict | list[dict]
+) -> int:
+    """Insert rows, skipping those that violate a unique constraint
+
+    Uses INSERT ... ON CONFLICT DO NOTHING, or INSERT IGNORE on MySQL, so
+    concurrent requests never fail with an integrity error or need a select
+    first. Other dialects insert each row in a savepoint and skip the rows
+    raising an IntegrityError.
+
+    Args:
+        db (Session): Session to insert with, committed by the caller
+        model (DeclarativeMeta): Model of the table
+        values (dict | list[dict]): Column values of one or more rows
+
+    Returns:
+        int: Number of inserted rows, 0 if they all existed already
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+
+        statement = insert(model).values(values).on_conflict_do_nothing()
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+
+        statement = insert(model).values(values).on_conflict_do_nothing()
+    elif dialect == "mysql":
+        statement = sa.insert(model).values(values).prefix_with("IGNORE")
+    else:
+        return insert_each_in_savepoint(db, model, values)
+    return db.execute(statement).rowcount
+
+
+def insert_each_in_savepoint(
+    db: Session, model: DeclarativeMeta, values: dict | list[dict]
+) -> int:
+    """Insert rows one at a time, rolling back those violating a constraint
+
+    Args:
+        db (Session): Session to insert with, committed by the caller
+        model (DeclarativeMeta): Model of the table
+        values (dict | list[dict]): Column values of one or more rows
+
+    Returns:
+        int: Number of inserted rows
+    """
+    inserted = 0
+    for row in values if isinstance(values, list) else [values]:
+        try:
+            with db.begin_nested():
+                db.execute(sa.insert(model).values(row))
+        except IntegrityError:
+            continue
+        inserted += 1
+    return inserted